@@ -0,0 +1,177 @@
+"""
+HTTP transport shared by migration_validator, db_faker and stage_validator.
+
+The Appwrite SDK sends every call with requests.request, a new connection each time and no
+timeout. PooledClient sends them through one requests.Session instead: a pool of keep-alive
+connections sized for the threads using it, a timeout on every call and, optionally, gzip
+request bodies. Responses come gzip-compressed whenever the server supports it, requests asks
+for that and decompresses them. Every call also passes through a rate_control.AdaptiveLimiter
+and is recorded in metrics.metrics.
+
+client = PooledClient(pool_size=16, timeout=60).set_endpoint(ENDPOINT).set_project(PROJECT_ID).set_key(API_KEY)
+user_client = client.clone(credentials=False).set_session(secret)  # own headers, same pool
+"""
+import os
+import gzip
+import json
+import time
+import requests
+import http.cookiejar
+from requests.adapters import HTTPAdapter
+from appwrite.client import Client
+from appwrite.exception import AppwriteException
+from appwrite.input_file import InputFile
+from appwrite.encoders.value_class_encoder import ValueClassEncoder
+from rate_control import AdaptiveLimiter, retry_after
+from metrics import metrics
+
+DEFAULT_POOL_SIZE = int(os.environ.get("APPWRITE_POOL_SIZE", 10))
+DEFAULT_TIMEOUT = float(os.environ.get("APPWRITE_TIMEOUT", 120))  # seconds to wait for a response
+CONNECT_TIMEOUT = 10
+COMPRESS_MIN_BYTES = 1024  # smaller bodies are not worth compressing
+CREDENTIAL_HEADERS = ("x-appwrite-key", "x-appwrite-jwt", "x-appwrite-session")
+
+
+class PooledClient(Client):
+    """
+    Appwrite Client whose calls share a pool of keep-alive connections, it can be used from
+    several threads at once. With more threads than `pool_size` the extra ones wait for a free
+    connection instead of opening throwaway ones. The limiter is shared with clones too, they
+    spend the same server budget.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, compress=False):
+        super().__init__()
+        self._session = requests.Session()
+        # Clones share the session, a Set-Cookie (e.g. a_session_<project>) must not authenticate the others
+        self._session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        self._timeout = timeout
+        self._compress = compress
+        self._limiter = AdaptiveLimiter(max_concurrency=pool_size)
+        self.configure(pool_size=pool_size)
+
+    def configure(self, pool_size=None, timeout=None, compress=None, limiter=None):
+        """Change the pool size (shared with clones), the response timeout, request compression or the limiter."""
+        if limiter is not None:
+            self._limiter = limiter
+        if pool_size is not None:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+            self._limiter.resize(pool_size)
+        if timeout is not None:
+            self._timeout = timeout
+        if compress is not None:
+            self._compress = compress
+        return self
+
+    def clone(self, credentials=True):
+        """
+        Client with a copy of this one's endpoint and headers that shares its connection pool,
+        e.g. to authenticate as another user. credentials=False drops the key, JWT and session.
+        """
+        other = PooledClient.__new__(PooledClient)
+        other.__dict__.update(self.__dict__)
+        other._global_headers = dict(self._global_headers)
+        if not credentials:
+            for header in CREDENTIAL_HEADERS:
+                other._global_headers.pop(header, None)
+        return other
+
+    def call(self, method, path='', headers=None, params=None, response_type='json'):
+        # Same request and error handling as Client.call, sent through the pooled session.
+        # response_type='bytes' returns the body as sent, whatever its Content-Type
+        if headers is None:
+            headers = {}
+        if params is None:
+            params = {}
+        params = {k: v for k, v in params.items() if v is not None}
+
+        data = {}
+        files = {}
+        stringify = False
+        headers = {**self._global_headers, **headers}
+
+        if method != 'get':
+            data = params
+            params = {}
+
+        if headers['content-type'].startswith('application/json'):
+            with metrics.stage("encode_request"):
+                data = json.dumps(data, cls=ValueClassEncoder)
+            if self._compress and len(data) >= COMPRESS_MIN_BYTES:
+                with metrics.stage("compress_request"):
+                    data = gzip.compress(data.encode("utf-8"))
+                headers['content-encoding'] = 'gzip'
+
+        if headers['content-type'].startswith('multipart/form-data'):
+            del headers['content-type']
+            stringify = True
+            for key in data.copy():
+                if isinstance(data[key], InputFile):
+                    files[key] = (data[key].filename, data[key].data)
+                    del data[key]
+            data = self.flatten(data, stringify=stringify)
+
+        if isinstance(data, (str, bytes)):
+            sent = len(data)
+        else:
+            sent = sum(len(file[1]) for file in files.values())
+        response = None
+        try:
+            self._limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self._session.request(
+                    method=method,
+                    url=self._endpoint + path,
+                    params=self.flatten(params, stringify=stringify),
+                    data=data,
+                    files=files,
+                    headers=headers,
+                    verify=(not self._self_signed),
+                    allow_redirects=False if response_type == 'location' else True,
+                    timeout=(CONNECT_TIMEOUT, self._timeout)
+                )
+            finally:
+                seconds = time.perf_counter() - started
+                if response is None:
+                    self._limiter.release()
+                    metrics.record_request(method, path, seconds, None, sent, 0)
+                else:
+                    self._limiter.release(response.status_code, response.headers)
+                    metrics.record_request(method, path, seconds, response.status_code, sent, len(response.content))
+
+            response.raise_for_status()
+
+            warnings = response.headers.get('x-appwrite-warning')
+            if warnings:
+                for warning in warnings.split(';'):
+                    print(f'Warning: {warning}')
+
+            content_type = response.headers['Content-Type']
+
+            if response_type == 'location':
+                return response.headers.get('Location')
+
+            if response_type == 'bytes':
+                return response.content
+
+            if content_type.startswith('application/json'):
+                with metrics.stage("decode_response"):
+                    return response.json()
+
+            return response._content
+        except Exception as e:
+            if response is not None:
+                content_type = response.headers['Content-Type']
+                if content_type.startswith('application/json'):
+                    error = AppwriteException(response.json()['message'], response.status_code, response.json().get('type'), response.text)
+                else:
+                    error = AppwriteException(response.text, response.status_code, None, response.text)
+                if response.status_code in (429, 503):
+                    # Read by rate_control.backoff
+                    error.retry_after = retry_after(response.headers)
+                raise error
+            else:
+                raise AppwriteException(e)
@@ -0,0 +1,236 @@
+"""
+Batched document reads and writes shared by migration_validator and db_faker.
+
+upload_batches(databases, "db", "posts", docs, batch_size=100, workers=4)
+for page in iter_document_pages(databases, "db", "posts", page_size=1000): ...
+"""
+import time
+import json
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from appwrite.query import Query
+from rate_control import backoff, is_transient, retry_call
+from metrics import metrics
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000  # Appwrite rejects Query.limit above this
+DEFAULT_MAX_PAYLOAD_BYTES = 2 * 1024 * 1024  # keep each request well under the server's body limit
+EQUAL_VALUES_LIMIT = 100  # Appwrite takes at most 100 values per Query.equal
+
+
+def iter_batches(documents, batch_size=DEFAULT_BATCH_SIZE, max_payload_bytes=DEFAULT_MAX_PAYLOAD_BYTES):
+    """Group any iterable of documents into batches capped by count and by encoded size."""
+    batch = []
+    batch_bytes = 0
+    for doc in documents:
+        doc_bytes = len(json.dumps(doc, default=str)) + 1
+        if batch and (len(batch) >= batch_size or batch_bytes + doc_bytes > max_payload_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(doc)
+        batch_bytes += doc_bytes
+    if batch:
+        yield batch
+
+
+def send_batch(databases, database_id, collection_id, documents):
+    databases.create_documents(
+        database_id=database_id,
+        collection_id=collection_id,
+        documents=documents
+    )
+
+
+def existing_ids(databases, database_id, collection_id, ids):
+    """Those of `ids` that are already documents of the collection."""
+    found = set()
+    for start in range(0, len(ids), EQUAL_VALUES_LIMIT):
+        chunk = ids[start:start + EQUAL_VALUES_LIMIT]
+        docs = retry_call(
+            databases.list_documents,
+            database_id=database_id,
+            collection_id=collection_id,
+            queries=[Query.equal("$id", chunk), Query.select(["$id"]), Query.limit(len(chunk))]
+        )["documents"]
+        found.update(doc["$id"] for doc in docs)
+    return found
+
+
+def isolate_failed_rows(databases, database_id, collection_id, documents, error):
+    """
+    A batch is rejected as a whole, so split it in halves until the rows the server
+    refuses are found. Every other row still gets written. A conflict is usually a batch
+    partly written before a crash: its existing rows are looked up and dropped first, they
+    are reported with code 409. When the lookup fails the batch is halved like any other.
+    """
+    if len(documents) == 1:
+        return [{"$id": documents[0].get("$id"), "error": str(error), "code": getattr(error, "code", None)}]
+    if is_conflict(error):
+        ids = [doc["$id"] for doc in documents if doc.get("$id")]
+        try:
+            existing = existing_ids(databases, database_id, collection_id, ids)
+        except Exception:
+            # Without the lookup the halving below still finds the conflicting rows
+            existing = set()
+        if existing:
+            failed = [{"$id": doc_id, "error": str(error), "code": 409} for doc_id in ids if doc_id in existing]
+            rest = [doc for doc in documents if doc.get("$id") not in existing]
+            if rest:
+                try:
+                    retry_call(send_batch, databases, database_id, collection_id, rest)
+                except Exception as rest_error:
+                    failed.extend(isolate_failed_rows(databases, database_id, collection_id, rest, rest_error))
+            return failed
+    failed = []
+    middle = len(documents) // 2
+    for half in (documents[:middle], documents[middle:]):
+        try:
+            retry_call(send_batch, databases, database_id, collection_id, half)
+        except Exception as half_error:
+            failed.extend(isolate_failed_rows(databases, database_id, collection_id, half, half_error))
+    return failed
+
+
+def is_payload_too_large(error):
+    return getattr(error, "code", None) == 413
+
+
+def is_conflict(error):
+    # 409: the id is already taken, e.g. by a row written before a crash
+    return getattr(error, "code", None) == 409
+
+
+def upload_batches(databases, database_id, collection_id, documents, batch_size=DEFAULT_BATCH_SIZE, workers=1,
+                   max_attempts=10, max_payload_bytes=DEFAULT_MAX_PAYLOAD_BYTES, skip_batches=None, on_batch=None):
+    """
+    Write `documents` (any iterable, consumed lazily) with create_documents, keeping up to
+    `workers` batches in flight. A batch failing on a transient error (see rate_control) waits
+    out its backoff in a retry queue while the free slots keep sending new batches; a batch
+    refused as too large is split in two, other errors go straight to isolate_failed_rows.
+
+    Batches are numbered in the order they are read from `documents`. Those in `skip_batches`
+    are not sent, and `on_batch(index, uploaded, failed)` is called once every row of a batch
+    is written or given up on, which is what a resumable caller records.
+
+    Returns {"uploaded", "failed", "retries", "seconds", "docs_per_second"} where `failed`
+    lists single rows ({"$id", "error", "code"}), not whole batches.
+    """
+    workers = max(1, workers)
+    name = f"{database_id}/{collection_id}"
+    metrics.count_documents("written", name, 0)
+    report = {"uploaded": 0, "failed": [], "retries": 0}
+    batches = iter_batches(documents, batch_size, max_payload_bytes)
+    exhausted = False
+    in_flight = {}  # future -> (kind, index, batch, attempt)
+    retry_queue = []  # heap of (ready_at, sequence, index, batch, attempt)
+    pieces = {}  # batch index -> [parts still pending after splits, uploaded, failed rows]
+    sequence = 0
+    next_index = 0
+    start = time.monotonic()
+
+    def settle(index, uploaded, failed):
+        metrics.count_documents("written", name, uploaded)
+        state = pieces[index]
+        state[0] -= 1
+        state[1] += uploaded
+        state[2].extend(failed)
+        if state[0] == 0:
+            del pieces[index]
+            if on_batch:
+                on_batch(index, state[1], state[2])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            # Fill free slots, batches whose backoff is over go first
+            while len(in_flight) < workers:
+                if retry_queue and retry_queue[0][0] <= time.monotonic():
+                    _, _, index, batch, attempt = heapq.heappop(retry_queue)
+                elif not exhausted:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        continue
+                    index = next_index
+                    next_index += 1
+                    if skip_batches and index in skip_batches:
+                        continue
+                    pieces[index] = [1, 0, []]
+                    attempt = 1
+                else:
+                    break
+                future = executor.submit(send_batch, databases, database_id, collection_id, batch)
+                in_flight[future] = ("send", index, batch, attempt)
+
+            if not in_flight:
+                if exhausted and not retry_queue:
+                    break
+                time.sleep(max(0, retry_queue[0][0] - time.monotonic()))
+                continue
+
+            # A retry that is due can only start once a slot frees, waking for it sooner would spin
+            timeout = None
+            if retry_queue and len(in_flight) < workers:
+                timeout = max(0, retry_queue[0][0] - time.monotonic())
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, index, batch, attempt = in_flight.pop(future)
+                if kind == "isolate":
+                    failed = future.result()
+                    report["failed"].extend(failed)
+                    report["uploaded"] += len(batch) - len(failed)
+                    settle(index, len(batch) - len(failed), failed)
+                    continue
+
+                error = future.exception()
+                if error is None:
+                    report["uploaded"] += len(batch)
+                    settle(index, len(batch), [])
+                elif is_payload_too_large(error) and len(batch) > 1:
+                    middle = len(batch) // 2
+                    pieces[index][0] += 1
+                    for half in (batch[:middle], batch[middle:]):
+                        sequence += 1
+                        heapq.heappush(retry_queue, (time.monotonic(), sequence, index, half, attempt))
+                elif is_transient(error) and attempt < max_attempts:
+                    wait_seconds = backoff(attempt, error)
+                    print(f"⚠️ Attempt {attempt} failed for chunk in `{collection_id}`: {error}")
+                    print(f"⏳ Retrying in {wait_seconds:.2f}s...")
+                    report["retries"] += 1
+                    sequence += 1
+                    heapq.heappush(retry_queue, (time.monotonic() + wait_seconds, sequence, index, batch, attempt + 1))
+                else:
+                    # Retrying cannot help a refused batch (a bad row, an id that exists), find its rows
+                    if is_transient(error):
+                        print(f"❌ Batch of {len(batch)} failed after {max_attempts} attempts in `{collection_id}`, isolating bad rows")
+                    isolate = executor.submit(isolate_failed_rows, databases, database_id, collection_id, batch, error)
+                    in_flight[isolate] = ("isolate", index, batch, attempt)
+
+    report["seconds"] = time.monotonic() - start
+    report["docs_per_second"] = report["uploaded"] / report["seconds"] if report["seconds"] else 0.0
+    return report
+
+
+def iter_document_pages(databases, database_id, collection_id, page_size=DEFAULT_PAGE_SIZE, queries=None, cursor=None):
+    """
+    Yield every page of a collection with cursor_after paging, `queries` are added to each request.
+    With `cursor` paging starts after that document id.
+    """
+    metrics.count_documents("read", f"{database_id}/{collection_id}", 0)
+    while True:
+        page_queries = [Query.limit(page_size), *(queries or [])]
+        if cursor:
+            page_queries.append(Query.cursor_after(cursor))
+        docs = retry_call(
+            databases.list_documents,
+            database_id=database_id,
+            collection_id=collection_id,
+            queries=page_queries
+        )["documents"]
+        if docs:
+            metrics.count_documents("read", f"{database_id}/{collection_id}", len(docs))
+            yield docs
+        if len(docs) < page_size:
+            return
+        cursor = docs[-1]["$id"]
@@ -8,6 +8,18 @@ python bulk_appwrite_tool.py --generate
 # Generate 500 posts only and save to file, no upload
 python bulk_appwrite_tool.py --generate --count 500 --collections posts --dry-run --output posts.json
 
+# Generate and upload 5M docs as a stream, spilling them to a JSON Lines file on the way
+python db_faker.py --generate --stream --count 5000000 --output generated.jsonl
+
+# Shard generation over 32 processes, same output for --seed 7 whatever --procs is
+python db_faker.py --generate --stream --count 5000000 --seed 7 --procs 32
+
+# Columnar generation: NumPy-backed numbers and strings sampled from pre-built Faker pools
+python db_faker.py --generate --stream --count 5000000 --columnar --procs 8
+
+# Request latencies, docs/s and time spent generating and serializing, with a live progress line
+python db_faker.py --generate --stream --count 100000 --metrics-out faker_metrics.csv --progress
+
 # Upload from file later and compare
 python bulk_appwrite_tool.py --compare --collections posts --output posts.json
 
@@ -17,6 +29,9 @@ python db_faker.py --init-csv-collection
 # Create 'csv' collection (if not exists) and generate CSV for import with target size (default 10MB)
 python db_faker.py --csv-with-a-size
 python db_faker.py --csv-with-a-size --csv-size 5 --csv-output my_import.csv
+
+# 10 GB load-test fixture from pre-generated value pools on 16 processes
+python db_faker.py --csv-with-a-size --csv-size 10240 --csv-fast --csv-procs 16
 """
 import os
 import re
@@ -24,15 +39,29 @@ import time
 import json
 import random
 import argparse
+import io
 import csv
+import queue
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from faker import Faker
+try:
+    import numpy
+except ImportError:  # pinned in requirements.txt, without it columnar generation falls back to the stdlib
+    numpy = None
 from dotenv import load_dotenv
-from appwrite.client import Client
 from appwrite.id import ID
+from appwrite.query import Query
 from appwrite.services.databases import Databases
 from appwrite.permission import Permission
 from appwrite.role import Role
-from deepdiff import DeepDiff
+from appwrite_transport import PooledClient, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from rate_control import AdaptiveLimiter
+from bulk import upload_batches, iter_document_pages
+from metrics import metrics
+from snapshot_diff import diff_documents, has_differences
 
 # Load environment
 load_dotenv()
@@ -42,7 +71,7 @@ API_KEY = "standard_06782f4f6529ce57af946db0b6e45926a0befed8ee23fe5aa1f80b20c2ad
 DATABASE_ID = os.getenv("APPWRITE_DATABASE_ID") or "auto-generated-db"
 
 # Appwrite setup
-client = Client()
+client = PooledClient()
 client.set_endpoint(ENDPOINT).set_project(PROJECT_ID).set_key(API_KEY)
 databases = Databases(client)
 faker = Faker()
@@ -111,6 +140,14 @@ GENERATOR_MAP = {
 }
 
 CHUNK_SIZE = 100
+VALUE_POOL_SIZE = 10000  # distinct values per text field with --columnar
+SHARD_SIZE = 1000  # docs per generation task with --procs, fixed so output doesn't depend on the process count
+PULL_PAGE_SIZE = 1000
+PIPELINE_QUEUE_SIZE = 10 * CHUNK_SIZE
+CSV_DESCRIPTION_PREFIX = "This is a long description field to increase file size. "
+CSV_POOL_SIZE = 5000  # distinct values per text column in --csv-fast
+CSV_BLOCK_ROWS = 5000  # docs buffered between generation and upload
+DEFAULT_OUTPUT = "generated.json"
 
 def init_database():
     try:
@@ -161,34 +198,131 @@ def ensure_csv_collection():
     print(f"✅ Schema ready for collection `{collection_id}`")
 
 
-def generate_csv_with_size(target_size_bytes, output_path="large_file.csv", seed=None):
-    """Generate a CSV file with columns matching the 'csv' collection until file reaches target size."""
-    if seed is not None:
-        random.seed(seed)
-        Faker.seed(seed)
-
-    fields = COLLECTIONS["csv"]
+def csv_import_filename(output_path):
     # Add _import prefix before file extension
     if output_path.endswith('.csv'):
-        filename = output_path[:-4] + '_import.csv'
+        return output_path[:-4] + '_import.csv'
+    return output_path + '_import.csv'
+
+
+def encode_csv_row(row):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+def iter_faker_csv_rows():
+    i = 0
+    while True:
+        row = [
+            str(i),
+            faker.name(),
+            faker.email(),
+            CSV_DESCRIPTION_PREFIX + faker.text(max_nb_chars=200),
+        ]
+        row += [faker.sentence() for _ in range(8)]
+        yield encode_csv_row(row)
+        i += 1
+
+
+def build_csv_pools(seed, size=CSV_POOL_SIZE):
+    """Pre-generate the Faker values the fast CSV mode samples from."""
+    Faker.seed(seed)
+    return {
+        "name": [faker.name() for _ in range(size)],
+        "email": [faker.email() for _ in range(size)],
+        "description": [CSV_DESCRIPTION_PREFIX + faker.text(max_nb_chars=200) for _ in range(size)],
+        "sentence": [faker.sentence() for _ in range(size)],
+    }
+
+
+_csv_pools = None
+
+
+def _init_csv_worker(pools):
+    global _csv_pools
+    _csv_pools = pools
+
+
+def generate_csv_block(block, seed):
+    """Encoded rows CSV_BLOCK_ROWS * block .. + CSV_BLOCK_ROWS, sampled from the pools with a per-block seed."""
+    rng = random.Random(shard_seed(seed, "csv", block))
+    pools = _csv_pools
+    start = block * CSV_BLOCK_ROWS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = []
+    for i in range(start, start + CSV_BLOCK_ROWS):
+        writer.writerow([
+            str(i),
+            rng.choice(pools["name"]),
+            rng.choice(pools["email"]),
+            rng.choice(pools["description"]),
+            *rng.choices(pools["sentence"], k=8),
+        ])
+        rows.append(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0)
+        buffer.truncate()
+    return rows
+
+
+def iter_pooled_csv_rows(seed, procs=1):
+    """
+    Rows of the fast CSV mode. Blocks are produced by `procs` processes and yielded in
+    block order, so the file for a seed is the same whatever the number of processes.
+    """
+    pools = build_csv_pools(seed)
+    if procs <= 1:
+        _init_csv_worker(pools)
+        block = 0
+        while True:
+            yield from generate_csv_block(block, seed)
+            block += 1
+
+    pool = ProcessPoolExecutor(max_workers=procs, initializer=_init_csv_worker, initargs=(pools,))
+    pending = deque()
+    block = 0
+    try:
+        while True:
+            while len(pending) < 2 * procs:
+                pending.append(pool.submit(generate_csv_block, block, seed))
+                block += 1
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_csv_with_size(target_size_bytes, output_path="large_file.csv", seed=None, fast=False, procs=1):
+    """
+    Generate a CSV file with columns matching the 'csv' collection until file reaches target size.
+    Bytes are counted in memory. `fast` samples rows from pre-generated Faker pools instead of
+    calling Faker for every cell, optionally on `procs` processes.
+    """
+    if fast:
+        seed = seed if seed is not None else random.randrange(2 ** 32)
+        rows = iter_pooled_csv_rows(seed, procs)
     else:
-        filename = output_path + '_import.csv'
-    with open(filename, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(fields)
+        if seed is not None:
+            random.seed(seed)
+            Faker.seed(seed)
+        rows = iter_faker_csv_rows()
+
+    fields = COLLECTIONS["csv"]
+    filename = csv_import_filename(output_path)
+    with open(filename, "wb") as f:
+        header = encode_csv_row(fields)
+        f.write(header)
+        written = len(header)
         i = 0
-        while os.path.getsize(filename) < target_size_bytes:
-            row = [
-                str(i),
-                faker.name(),
-                faker.email(),
-                "This is a long description field to increase file size. " + faker.text(max_nb_chars=200),
-            ]
-            row += [faker.sentence() for _ in range(8)]
-            writer.writerow(row)
+        for row in rows:
+            if written >= target_size_bytes:
+                break
+            f.write(row)
+            written += len(row)
             i += 1
+    rows.close()
 
-    size_mb = os.path.getsize(filename) / (1024 * 1024)
+    size_mb = written / (1024 * 1024)
     print("CSV generated:", round(size_mb, 2), "MB", f"({i} rows)")
     return filename
 
@@ -246,13 +380,23 @@ def init_collections():
         except Exception as e:
             print(f"⚠️ Collection `{collection}` may already exist: {e}")
 
-def generate_documents(count, collections_filter=None, seed=None):
+def generate_documents(count, collections_filter=None, seed=None, procs=None, columnar=False):
+    targets = {k: v for k, v in COLLECTIONS.items() if (not collections_filter or k in collections_filter)}
+    if procs or columnar:
+        seed = seed if seed is not None else random.randrange(2 ** 32)
+        if not procs or procs == 1:
+            return {collection: list(iter_sharded(collection, count, seed, columnar=columnar)) for collection in targets}
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            return {
+                collection: list(iter_sharded(collection, count, seed, pool, procs, columnar))
+                for collection in targets
+            }
+
     if seed:
         random.seed(seed)
         Faker.seed(seed)
 
     data = {}
-    targets = {k: v for k, v in COLLECTIONS.items() if (not collections_filter or k in collections_filter)}
     for collection, fields in targets.items():
         data[collection] = []
         for _ in range(count):
@@ -260,33 +404,191 @@ def generate_documents(count, collections_filter=None, seed=None):
             data[collection].append(doc)
     return data
 
-def chunked(lst, size):
-    for i in range(0, len(lst), size):
-        yield lst[i:i + size]
+def iter_generated(collection, count):
+    fields = COLLECTIONS[collection]
+    for _ in range(count):
+        yield {field: GENERATOR_MAP[field]() for field in fields}
+
+def shard_seed(seed, collection, shard):
+    digest = hashlib.sha256(f"{seed}:{collection}:{shard}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def generate_shard(collection, shard, size, seed):
+    # Every shard reseeds from (seed, collection, shard), so it does not matter which process runs it
+    shard_rng_seed = shard_seed(seed, collection, shard)
+    random.seed(shard_rng_seed)
+    Faker.seed(shard_rng_seed)
+    return list(iter_generated(collection, size))
+
+def iter_sharded(collection, count, seed, pool=None, procs=1, columnar=False):
+    """
+    Generate `count` docs in SHARD_SIZE shards on a process pool, yielding them in shard order.
+    At most 2 * procs shards are pending at a time so a slow consumer keeps memory bounded.
+    Columnar shards travel as columns and are only turned into rows here.
+    """
+    shards = [(shard, min(SHARD_SIZE, count - start)) for shard, start in enumerate(range(0, count, SHARD_SIZE))]
+    generate = generate_column_shard if columnar else generate_shard
+    expand = iter_rows if columnar else iter
+
+    if pool is None:
+        for shard, size in shards:
+            yield from expand(generate(collection, shard, size, seed))
+        return
+
+    pending = deque()
+    for shard, size in shards:
+        pending.append(pool.submit(generate, collection, shard, size, seed))
+        if len(pending) >= 2 * procs:
+            yield from expand(pending.popleft().result())
+    while pending:
+        yield from expand(pending.popleft().result())
+
+class ColumnSampler:
+    """Draws whole columns at once, with NumPy when it is installed and the stdlib otherwise."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.numpy = numpy.random.default_rng(seed) if numpy is not None else None
+
+    def integers(self, low, high, n):
+        if self.numpy is not None:
+            return self.numpy.integers(low, high + 1, n).tolist()
+        return [self.random.randint(low, high) for _ in range(n)]
+
+    def floats(self, low, high, n):
+        if self.numpy is not None:
+            return numpy.round(self.numpy.uniform(low, high, n), 2).tolist()
+        return [round(self.random.uniform(low, high), 2) for _ in range(n)]
+
+    def booleans(self, n):
+        if self.numpy is not None:
+            return (self.numpy.random(n) < 0.5).tolist()
+        return [self.random.random() < 0.5 for _ in range(n)]
+
+    def choices(self, values, n):
+        if self.numpy is not None:
+            return [values[i] for i in self.numpy.integers(0, len(values), n).tolist()]
+        return self.random.choices(values, k=n)
+
+# Column generators for the numeric fields, every other field samples its value pool
+COLUMN_GENERATOR_MAP = {
+    "age": lambda sampler, n: sampler.integers(18, 65, n),
+    "price": lambda sampler, n: sampler.floats(10, 500, n),
+    "in_stock": lambda sampler, n: sampler.booleans(n),
+    "category": lambda sampler, n: sampler.choices(["Electronics", "Clothing", "Home", "Sports"], n),
+    "likes": lambda sampler, n: sampler.integers(0, 10000, n),
+    "published": lambda sampler, n: sampler.booleans(n),
+    "attendees": lambda sampler, n: sampler.integers(0, 1000, n),
+}
 
-def upload_documents(data, max_attempts=10):
+_value_pools = {}
+
+def value_pool(field, seed):
+    """VALUE_POOL_SIZE values of a text field, built once per process and seed."""
+    key = (field, seed)
+    if key not in _value_pools:
+        pool_seed = shard_seed(seed, f"pool:{field}", 0)
+        random.seed(pool_seed)
+        Faker.seed(pool_seed)
+        _value_pools[key] = [GENERATOR_MAP[field]() for _ in range(VALUE_POOL_SIZE)]
+    return _value_pools[key]
+
+def generate_column_shard(collection, shard, size, seed):
+    sampler = ColumnSampler(shard_seed(seed, collection, shard))
+    columns = {}
+    for field in COLLECTIONS[collection]:
+        if field in COLUMN_GENERATOR_MAP:
+            columns[field] = COLUMN_GENERATOR_MAP[field](sampler, size)
+        else:
+            columns[field] = sampler.choices(value_pool(field, seed), size)
+    return columns
+
+def iter_rows(columns):
+    fields = list(columns)
+    for values in zip(*columns.values()):
+        yield dict(zip(fields, values))
+
+def stream_documents(count, collections_filter=None, seed=None, spill_path=None, procs=None, columnar=False):
+    """
+    Generate documents on a producer thread into a bounded queue and hand back one lazy
+    iterator per collection. Memory stays at PIPELINE_QUEUE_SIZE docs whatever the count,
+    and each doc is written to `spill_path` (JSON Lines) as it is consumed.
+    Iterators must be consumed in order, the same order the producer generates in.
+    With `procs` generation is sharded over that many processes, `columnar` generates
+    whole columns per shard (see generate_column_shard).
+    """
+    if procs or columnar:
+        seed = seed if seed is not None else random.randrange(2 ** 32)
+    elif seed:
+        random.seed(seed)
+        Faker.seed(seed)
+
+    targets = [k for k in COLLECTIONS if (not collections_filter or k in collections_filter)]
+    pipe = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    end_of_collection = object()
+
+    def produce():
+        pool = ProcessPoolExecutor(max_workers=procs) if procs and procs > 1 else None
+        try:
+            for collection in targets:
+                if procs or columnar:
+                    docs = iter_sharded(collection, count, seed, pool, procs, columnar)
+                else:
+                    docs = iter_generated(collection, count)
+                for doc in docs:
+                    pipe.put(doc)
+                pipe.put(end_of_collection)
+        except Exception as e:
+            pipe.put(e)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    threading.Thread(target=produce, daemon=True).start()
+    spill = open(spill_path, "w") if spill_path else None
+
+    def drain(collection):
+        while True:
+            doc = pipe.get()
+            if doc is end_of_collection:
+                break
+            if isinstance(doc, Exception):
+                raise doc
+            if spill:
+                with metrics.stage("spill"):
+                    spill.write(json.dumps({"collection": collection, "document": doc}) + "\n")
+            yield doc
+        if spill and collection == targets[-1]:
+            spill.close()
+
+    return {collection: drain(collection) for collection in targets}
+
+def upload_documents(data, max_attempts=10, workers=1):
+    total = {"uploaded": 0, "failed": 0, "retries": 0, "seconds": 0.0}
     for collection, docs in data.items():
-        print(f"⬆ Uploading {len(docs)} docs to `{collection}`")
-        for chunk in chunked(docs, CHUNK_SIZE):
-            documents = [{"$id": ID.unique(), **doc} for doc in chunk]
-
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    databases.create_documents(
-                        database_id=DATABASE_ID,
-                        collection_id=collection,
-                        documents=documents
-                    )
-                    break  # ✅ Success
-                except Exception as e:
-                    wait = min(2 ** attempt + random.uniform(0, 1), 30)  # max wait cap 30s
-                    print(f"⚠️ Attempt {attempt} failed for chunk in `{collection}`: {e}")
-                    if attempt == max_attempts:
-                        print(f"❌ Failed to upload after {max_attempts} attempts.")
-                    else:
-                        print(f"⏳ Retrying in {wait:.2f}s...")
-                        time.sleep(wait)
-        print(f"✅ Upload complete for `{collection}`")
+        size = f"{len(docs)} " if hasattr(docs, "__len__") else ""
+        print(f"⬆ Uploading {size}docs to `{collection}`")
+        documents = ({"$id": ID.unique(), **doc} for doc in docs)
+        report = upload_batches(
+            databases, DATABASE_ID, collection, documents, CHUNK_SIZE,
+            workers=workers, max_attempts=max_attempts
+        )
+        if report["failed"]:
+            print(f"❌ {len(report['failed'])} docs failed to upload to `{collection}`")
+        print(
+            f"✅ Upload complete for `{collection}`: {report['uploaded']} docs in {report['seconds']:.1f}s "
+            f"({report['docs_per_second']:.0f} docs/s, {report['retries']} retries)"
+        )
+        total["uploaded"] += report["uploaded"]
+        total["failed"] += len(report["failed"])
+        total["retries"] += report["retries"]
+        total["seconds"] += report["seconds"]
+    if len(data) > 1 and total["seconds"]:
+        print(
+            f"📊 Uploaded {total['uploaded']} docs ({total['failed']} failed) at "
+            f"{total['uploaded'] / total['seconds']:.0f} docs/s with {total['retries']} retries"
+        )
+    return total
 
 def delete_dbs():
     for db in databases.list()['databases']:
@@ -298,21 +600,34 @@ def save_to_file(data, path):
 
 def load_from_file(path):
     with open(path, "r") as f:
-        return json.load(f)
-
-def pull_from_appwrite(collections_filter=None):
-    remote = {}
-    targets = {k: v for k, v in COLLECTIONS.items() if (not collections_filter or k in collections_filter)}
-    for collection in targets:
-        result = databases.list_documents(database_id=DATABASE_ID, collection_id=collection)
-        docs = []
-        for doc in result["documents"]:
-            docs.append({k: v for k, v in doc["data"].items()})
-        remote[collection] = docs
-    return remote
+        if not path.endswith(".jsonl"):
+            return json.load(f)
+        data = {}
+        for line in f:
+            record = json.loads(line)
+            data.setdefault(record["collection"], []).append(record["document"])
+        return data
+
+def pull_collection(collection):
+    # Only the schema fields cross the wire, $id is needed for the cursor
+    fields = COLLECTIONS[collection]
+    docs = []
+    for page in iter_document_pages(databases, DATABASE_ID, collection, PULL_PAGE_SIZE, [Query.select(["$id", *fields])]):
+        docs.extend({field: doc[field] for field in fields if field in doc} for doc in page)
+    return docs
+
+def pull_from_appwrite(collections_filter=None, workers=1):
+    targets = [k for k in COLLECTIONS if (not collections_filter or k in collections_filter)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return dict(zip(targets, executor.map(pull_collection, targets)))
 
 def compare(local, remote):
-    diff = DeepDiff(local, remote, ignore_order=True)
+    # Generated docs get their $id at upload time, so they are matched by content
+    diff = {}
+    for collection in sorted(set(local) | set(remote)):
+        col_diff = diff_documents(local.get(collection, []), remote.get(collection, []), key=None)
+        if has_differences(col_diff):
+            diff[collection] = col_diff
     return diff if diff else "✅ Local and remote data match!"
 
 def publish_event():
@@ -329,10 +644,14 @@ if __name__ == "__main__":
     parser.add_argument("--compare", action="store_true", help="Compare remote data with local file")
     parser.add_argument("--count", type=int, default=1000, help="Docs per collection")
     parser.add_argument("--collections", type=str, help="Comma-separated collection names")
-    parser.add_argument("--output", type=str, default="generated.json", help="Path to save generated data")
+    parser.add_argument("--output", type=str, help=f"Path to save generated data (default: {DEFAULT_OUTPUT}, with --stream only written when given)")
+    parser.add_argument("--stream", action="store_true", help="Generate, spill to --output as JSON Lines and upload as overlapping stages with constant memory")
     parser.add_argument("--attempts", type=int, default=10, help="Max retry attempts for upload")
+    parser.add_argument("--workers", type=int, default=4, help="create_documents calls in flight per collection, collections pulled in parallel for --compare")
     parser.add_argument("--dry-run", action="store_true", help="Skip upload, only generate and save")
     parser.add_argument("--seed", type=int, help="Seed for repeatable generation")
+    parser.add_argument("--columnar", action="store_true", help="Generate whole columns per shard (NumPy numbers, pooled Faker strings), a --seed gives the same output only with the same NumPy, see requirements.txt")
+    parser.add_argument("--procs", type=int, help="Generate in shards on this many processes, output for a --seed is the same for any value")
     parser.add_argument("--delete", type=bool, help="delete db of project id")
     parser.add_argument("--realtime", type=bool, help="create documents in the db at each interval. make sure to run index.html first to see")
     parser.add_argument("--init-csv-collection", action="store_true", help="Create 'csv' collection (if not exists) with all required string attributes")
@@ -340,7 +659,26 @@ if __name__ == "__main__":
     parser.add_argument("--csv-size", type=float, default=10, help="Target CSV size in MB (default: 10)")
     parser.add_argument("--csv-output", type=str, default="large_file.csv", help="Output path for generated CSV (will be suffixed with _import before .csv extension, default: large_file_import.csv)")
     parser.add_argument("--csv-seed", type=int, help="Optional seed for repeatable CSV generation")
+    parser.add_argument("--csv-fast", action="store_true", help="Sample CSV rows from pre-generated Faker pools instead of calling Faker per cell")
+    parser.add_argument("--csv-procs", type=int, default=1, help="Processes producing row blocks with --csv-fast")
+    parser.add_argument("--pool-size", type=int, help=f"Keep-alive connections shared by all threads (default: --workers, at least {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each response")
+    parser.add_argument("--rps", type=float, help="Cap on requests per second across all threads, the server's X-RateLimit budget is always followed")
+    parser.add_argument("--gzip-requests", action="store_true", help="Gzip request bodies, only for servers that accept Content-Encoding: gzip")
+    parser.add_argument("--metrics-out", type=str, help="Write request latencies, bytes, docs/s and stage timings to this file, CSV when it ends in .csv, JSON otherwise")
+    parser.add_argument("--progress", action="store_true", help="Keep a live progress line on stderr")
     args = parser.parse_args()
+    pool_size = args.pool_size or max(DEFAULT_POOL_SIZE, args.workers)
+    client.configure(
+        pool_size=pool_size,
+        timeout=args.timeout,
+        compress=args.gzip_requests,
+        limiter=AdaptiveLimiter(rate=args.rps, max_concurrency=pool_size)
+    )
+    if args.progress:
+        metrics.start_progress()
+    if args.columnar and numpy is None:
+        print("ℹ️ NumPy is not installed, --columnar uses random: output for a --seed differs from hosts with NumPy")
 
     selected_collections = args.collections.split(",") if args.collections else None
 
@@ -348,16 +686,29 @@ if __name__ == "__main__":
         init_database()
         init_collections()
 
-    if args.generate:
-        docs = generate_documents(args.count, selected_collections, args.seed)
-        save_to_file(docs, args.output)
-        print(f"📄 Data saved to `{args.output}`")
+    if args.generate and args.stream:
+        streams = stream_documents(args.count, selected_collections, args.seed, spill_path=args.output, procs=args.procs, columnar=args.columnar)
+        if args.dry_run:
+            for docs in streams.values():
+                for _ in docs:
+                    pass
+        else:
+            upload_documents(streams, max_attempts=args.attempts, workers=args.workers)
+        if args.output:
+            print(f"📄 Data saved to `{args.output}`")
+    elif args.generate:
+        output = args.output or DEFAULT_OUTPUT
+        with metrics.stage("generate"):
+            docs = generate_documents(args.count, selected_collections, args.seed, procs=args.procs, columnar=args.columnar)
+        with metrics.stage("save_file"):
+            save_to_file(docs, output)
+        print(f"📄 Data saved to `{output}`")
         if not args.dry_run:
-            upload_documents(docs)
+            upload_documents(docs, max_attempts=args.attempts, workers=args.workers)
 
     if args.compare:
-        local = load_from_file(args.output)
-        remote = pull_from_appwrite(selected_collections)
+        local = load_from_file(args.output or DEFAULT_OUTPUT)
+        remote = pull_from_appwrite(selected_collections, workers=args.workers)
         print(compare(local, remote))
 
     if args.realtime:
@@ -376,4 +727,12 @@ if __name__ == "__main__":
             target_size_bytes=target_bytes,
             output_path=args.csv_output,
             seed=args.csv_seed,
-        )
\ No newline at end of file
+            fast=args.csv_fast,
+            procs=args.csv_procs,
+        )
+
+    if args.progress:
+        metrics.stop_progress()
+    if args.metrics_out:
+        metrics.write_report(args.metrics_out)
+        print(f"📊 Metrics saved to `{args.metrics_out}`")
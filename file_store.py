@@ -0,0 +1,138 @@
+"""
+Bucket file contents kept in a content-addressed directory, shared by pull and seed.
+
+A file is stored once per checksum (its Appwrite `signature`, the MD5 of the contents) as
+<root>/<first two characters>/<signature>, so identical files in any bucket, or in the next
+pull into the same store, are downloaded once. Downloads are streamed as Range requests of
+CHUNK_SIZE bytes, read as raw bytes through appwrite_transport.PooledClient; uploads go
+through the SDK's chunked create_file, which reads the stored file one chunk at a time.
+
+store = ContentStore("snapshot_files")
+download_files(storage, store, [("avatars", file), ...], workers=4)
+upload_files(storage, store, [("avatars", file), ...], workers=4)
+"""
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from appwrite.input_file import InputFile
+from rate_control import retry_call
+
+CHUNK_SIZE = 5 * 1024 * 1024  # same as the SDK's upload chunks
+
+
+class ContentStore:
+    """Directory of file contents named by their MD5."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, signature):
+        return os.path.join(self.root, signature[:2], signature)
+
+    def has(self, signature):
+        return os.path.exists(self.path(signature))
+
+
+def download_file(storage, store, bucket_id, file):
+    """Stream one file into the store, checking it against its signature. Returns the bytes written."""
+    signature = file["signature"]
+    path = store.path(signature)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = f"{path}.{threading.get_ident()}.part"
+    api_path = f"/storage/buckets/{bucket_id}/files/{file['$id']}/download"
+    size = file["sizeOriginal"]
+    md5 = hashlib.md5()
+    try:
+        with open(part_path, "wb") as f:
+            for start in range(0, size, CHUNK_SIZE):
+                end = min(start + CHUNK_SIZE, size) - 1
+                # Raw bytes: a .json file is served as application/json and must not be decoded
+                chunk = retry_call(storage.client.call, "get", api_path, {"range": f"bytes={start}-{end}"},
+                                   response_type="bytes")
+                if len(chunk) == size and start == 0:
+                    # The server ignored the range and sent the whole file
+                    f.write(chunk)
+                    md5.update(chunk)
+                    break
+                if len(chunk) != end - start + 1:
+                    raise ValueError(f"expected bytes {start}-{end}, got {len(chunk)} bytes")
+                f.write(chunk)
+                md5.update(chunk)
+        if md5.hexdigest() != signature:
+            raise ValueError(f"checksum {md5.hexdigest()} does not match signature {signature}")
+        os.replace(part_path, path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    return size
+
+
+def upload_file(storage, store, bucket_id, file):
+    """Create one file from the store with its original id, name and permissions."""
+    input_file = InputFile.from_path(store.path(file["signature"]))
+    input_file.filename = file["name"]
+    storage.create_file(
+        bucket_id=bucket_id,
+        file_id=file["$id"],
+        file=input_file,
+        permissions=file.get("$permissions")
+    )
+    return file["sizeOriginal"]
+
+
+def download_files(storage, store, files, workers=1):
+    """
+    Download the contents of `files`, (bucket_id, file) pairs, `workers` at a time. Contents
+    already in the store, or shared with a file earlier in the list, are not downloaded again.
+
+    Returns {"downloaded", "reused", "bytes", "failed"} where `failed` lists {"$id", "error"}.
+    """
+    report = {"downloaded": 0, "reused": 0, "bytes": 0, "failed": []}
+    pending = {}
+    for bucket_id, file in files:
+        if store.has(file["signature"]) or file["signature"] in pending:
+            report["reused"] += 1
+        else:
+            pending[file["signature"]] = (bucket_id, file)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            (file, executor.submit(download_file, storage, store, bucket_id, file))
+            for bucket_id, file in pending.values()
+        ]
+        for file, future in futures:
+            try:
+                report["bytes"] += future.result()
+                report["downloaded"] += 1
+            except Exception as e:
+                report["failed"].append({"$id": file["$id"], "error": str(e)})
+    return report
+
+
+def upload_files(storage, store, files, workers=1, on_file=None):
+    """
+    Upload `files`, (bucket_id, file) pairs, from the store `workers` at a time.
+    `on_file(bucket_id, file, error)` is called as each one finishes, error being None on success.
+
+    Returns {"uploaded", "bytes", "failed"} where `failed` lists {"$id", "error", "code"}.
+    """
+    report = {"uploaded": 0, "bytes": 0, "failed": []}
+
+    def send(bucket_id, file):
+        if not store.has(file["signature"]):
+            raise FileNotFoundError(f"{file['signature']} is not in {store.root}")
+        return retry_call(upload_file, storage, store, bucket_id, file)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [(bucket_id, file, executor.submit(send, bucket_id, file)) for bucket_id, file in files]
+        for bucket_id, file, future in futures:
+            error = future.exception()
+            if error is None:
+                report["bytes"] += future.result()
+                report["uploaded"] += 1
+            else:
+                report["failed"].append({"$id": file["$id"], "error": str(error), "code": getattr(error, "code", None)})
+            if on_file:
+                on_file(bucket_id, file, error)
+    return report
@@ -0,0 +1,233 @@
+"""
+Sampled comparison of one collection between two live projects, without reading every document.
+
+Both sides are counted, then a random sample of $ids is drawn from each side, stratified by
+$sequence: the range between the lowest and highest $sequence is cut into SAMPLE_STRATA equal
+ranges and each range gives its share of the sample as distinct random values, each read as the
+first document at or after it. Every lookup goes through the $sequence index instead of skipping
+rows with an offset, and every document is an independent draw, so a bad contiguous range (a
+failed batch) is found as often as scattered bad rows. Deleted documents leave gaps in
+$sequence: the document after a gap is drawn more often, and draws landing in the same gap
+give the same document once. The sampled documents are fetched from both projects with
+Query.equal("$id", [...]) and compared attribute by attribute.
+
+Appwrite stops counting at COUNT_LIMIT, larger collections are counted by probing offsets.
+Each probe is a scan of that many rows on the server, so counting stops at MAX_COUNTED.
+
+With m of n sampled documents missing, extra or different, the share of such documents in the
+whole collection is below mismatch_bound(m, n) with 95% confidence: 3/n when m is 0 (the rule
+of three), the upper end of the Wilson score interval otherwise.
+
+report = sample_collection(Databases(prod), Databases(stage), "db", "posts", prod_attributes, stage_attributes)
+"""
+import math
+import random
+from concurrent.futures import ThreadPoolExecutor
+from appwrite.query import Query
+from rate_control import retry_call
+from bulk import EQUAL_VALUES_LIMIT, MAX_PAGE_SIZE
+
+DEFAULT_SAMPLE = 300  # per side, a 1% mismatch rate is caught with 95% confidence
+SAMPLE_STRATA = 10
+COUNT_LIMIT = 5000  # Appwrite stops counting a list's total here
+MAX_COUNTED = 1000000  # deepest offset probed when counting
+Z_95 = 1.96
+SHOWN_IDS = 5
+SAMPLE_WORKERS = 8  # one-document lookups read in parallel, the client's limiter still applies
+IGNORED_ATTRIBUTE_KEYS = ("status", "error", "$createdAt", "$updatedAt")
+
+
+def list_page(databases, db_id, col_id, limit, offset=0):
+    return retry_call(
+        databases.list_documents,
+        database_id=db_id,
+        collection_id=col_id,
+        queries=[Query.select(["$id"]), Query.limit(limit), Query.offset(offset)]
+    )
+
+
+def has_document_at(databases, db_id, col_id, offset):
+    return bool(list_page(databases, db_id, col_id, 1, offset)["documents"])
+
+
+def count_documents(databases, db_id, col_id, limit=MAX_COUNTED):
+    """Documents in a collection up to `limit`, found by probing offsets once the total reaches COUNT_LIMIT."""
+    total = list_page(databases, db_id, col_id, 1)["total"]
+    if total < COUNT_LIMIT:
+        return total
+    # Gallop to an offset past the end, then bisect: `low` documents exist, `high` do not
+    low, high = total, min(total * 2, limit)
+    while has_document_at(databases, db_id, col_id, high - 1):
+        if high >= limit:
+            return limit
+        low, high = high, min(high * 2, limit)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if has_document_at(databases, db_id, col_id, middle - 1):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def first_document(databases, db_id, col_id, queries):
+    docs = retry_call(
+        databases.list_documents,
+        database_id=db_id,
+        collection_id=col_id,
+        queries=[Query.select(["$id", "$sequence"]), *queries, Query.limit(1)]
+    )["documents"]
+    return docs[0] if docs else None
+
+
+def sequence_range(databases, db_id, col_id):
+    """Lowest and highest $sequence of a collection, None for an empty one."""
+    lowest = first_document(databases, db_id, col_id, [Query.order_asc("$sequence")])
+    highest = first_document(databases, db_id, col_id, [Query.order_desc("$sequence")])
+    if lowest is None or highest is None:
+        return None
+    return int(lowest["$sequence"]), int(highest["$sequence"])
+
+
+def id_at_sequence(databases, db_id, col_id, sequence):
+    """$id of the first document whose $sequence is at least `sequence`."""
+    doc = first_document(
+        databases, db_id, col_id,
+        [Query.greater_than_equal("$sequence", sequence), Query.order_asc("$sequence")]
+    )
+    return doc["$id"] if doc else None
+
+
+def sample_ids(databases, db_id, col_id, count, size, rng):
+    """Up to `size` random $ids of a collection of `count` documents, spread over SAMPLE_STRATA $sequence ranges."""
+    if count <= 0 or size <= 0:
+        return []
+    if size >= count:
+        # The sample is the whole collection, read it in full pages
+        return [
+            doc["$id"]
+            for offset in range(0, count, MAX_PAGE_SIZE)
+            for doc in list_page(databases, db_id, col_id, MAX_PAGE_SIZE, offset)["documents"]
+        ]
+    bounds = sequence_range(databases, db_id, col_id)
+    if bounds is None:
+        return []
+    lowest, highest = bounds
+    span = highest - lowest + 1
+    strata = min(SAMPLE_STRATA, size)
+    sequences = []
+    for stratum in range(strata):
+        start, end = lowest + span * stratum // strata, lowest + span * (stratum + 1) // strata
+        share = size // strata + (1 if stratum < size % strata else 0)
+        sequences.extend(rng.sample(range(start, end), min(share, end - start)))
+    with ThreadPoolExecutor(max_workers=SAMPLE_WORKERS) as executor:
+        ids = executor.map(lambda sequence: id_at_sequence(databases, db_id, col_id, sequence), sequences)
+        return list(dict.fromkeys(doc_id for doc_id in ids if doc_id is not None))
+
+
+def fetch_by_ids(databases, db_id, col_id, ids, select):
+    """{$id: document} for those of `ids` that exist, EQUAL_VALUES_LIMIT per request."""
+    docs = {}
+    for start in range(0, len(ids), EQUAL_VALUES_LIMIT):
+        batch = ids[start:start + EQUAL_VALUES_LIMIT]
+        page = retry_call(
+            databases.list_documents,
+            database_id=db_id,
+            collection_id=col_id,
+            queries=[Query.equal("$id", batch), Query.select(select), Query.limit(len(batch))]
+        )
+        docs.update((doc["$id"], doc) for doc in page["documents"])
+    return docs
+
+
+def comparable(doc):
+    # System keys ($sequence, $createdAt, ...) legitimately differ between two projects
+    return {k: v for k, v in doc.items() if not k.startswith("$") or k == "$id"}
+
+
+def attribute_diff(source_attributes, destination_attributes):
+    """Attribute keys missing from or extra in the destination, and those defined differently."""
+    def by_key(attributes):
+        return {
+            attr["key"]: {k: v for k, v in attr.items() if k not in IGNORED_ATTRIBUTE_KEYS}
+            for attr in attributes
+        }
+
+    src, dest = by_key(source_attributes), by_key(destination_attributes)
+    diff = {
+        "missing": sorted(set(src) - set(dest)),
+        "extra": sorted(set(dest) - set(src)),
+        "changed": sorted(key for key in set(src) & set(dest) if src[key] != dest[key])
+    }
+    return {k: v for k, v in diff.items() if v}
+
+
+def mismatch_bound(mismatches, sampled, z=Z_95):
+    """Upper bound on the mismatch rate of a collection where `mismatches` of `sampled` documents differ."""
+    if sampled == 0:
+        return 1.0
+    if mismatches == 0:
+        return min(1.0, 3 / sampled)
+    p = mismatches / sampled
+    centre = p + z * z / (2 * sampled)
+    margin = z * math.sqrt(p * (1 - p) / sampled + z * z / (4 * sampled * sampled))
+    return min(1.0, (centre + margin) / (1 + z * z / sampled))
+
+
+def sample_collection(source, destination, db_id, col_id, source_attributes, destination_attributes,
+                      size=DEFAULT_SAMPLE, rng=None):
+    """
+    Compare one collection of the `source` and `destination` Databases services from their
+    counts, attribute definitions and `size` sampled documents per side.
+
+    Returns {"source_count", "destination_count", "sampled", "mismatches", "max_mismatch_rate"},
+    plus "attributes" and "missing" / "extra" / "changed" ({"count", "ids"}) when they differ.
+    Relationship attributes are compared by definition only, not by value.
+    """
+    rng = rng or random.Random()
+    report = {
+        "source_count": count_documents(source, db_id, col_id),
+        "destination_count": count_documents(destination, db_id, col_id)
+    }
+    attributes = attribute_diff(source_attributes, destination_attributes)
+    if attributes:
+        report["attributes"] = attributes
+
+    ids = list(dict.fromkeys(
+        sample_ids(source, db_id, col_id, report["source_count"], size, rng)
+        + sample_ids(destination, db_id, col_id, report["destination_count"], size, rng)
+    ))
+    shared = {attr["key"] for attr in destination_attributes}
+    select = ["$id"] + [
+        attr["key"] for attr in source_attributes
+        if attr["key"] in shared and attr.get("type") != "relationship"
+    ]
+    src_docs = fetch_by_ids(source, db_id, col_id, ids, select)
+    dest_docs = fetch_by_ids(destination, db_id, col_id, ids, select)
+
+    found = {
+        "missing": [i for i in ids if i in src_docs and i not in dest_docs],
+        "extra": [i for i in ids if i in dest_docs and i not in src_docs],
+        "changed": [
+            i for i in ids
+            if i in src_docs and i in dest_docs and comparable(src_docs[i]) != comparable(dest_docs[i])
+        ]
+    }
+    # Ids deleted from both sides since they were drawn are not part of the sample
+    sampled = len([i for i in ids if i in src_docs or i in dest_docs])
+    mismatches = sum(len(found_ids) for found_ids in found.values())
+    report["sampled"] = sampled
+    report["mismatches"] = mismatches
+    report["max_mismatch_rate"] = round(mismatch_bound(mismatches, sampled), 6)
+    for name, found_ids in found.items():
+        if found_ids:
+            report[name] = {"count": len(found_ids), "ids": found_ids[:SHOWN_IDS]}
+    return report
+
+
+def format_count(count):
+    return f"{count}+" if count >= MAX_COUNTED else str(count)
+
+
+def is_match(report):
+    return report["source_count"] == report["destination_count"] and not report.get("attributes") and not report["mismatches"]
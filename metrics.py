@@ -0,0 +1,210 @@
+"""
+Timings and counters of one run, written as JSON or CSV by --metrics-out.
+
+Every call through appwrite_transport.PooledClient records its latency, status and the bytes
+it sent and received (after decompression) under its endpoint, ids replaced by {id}:
+"GET /databases/{id}/collections/{id}/documents". Documents read and written are counted per
+collection, and `stage` times the local work around the calls: request encoding, response
+decoding, system-key filtering, serialization, checkpoints.
+
+with metrics.stage("checkpoint"):
+    write_checkpoint(path, header)
+metrics.count_documents("read", "db/posts", len(page))
+metrics.write_report("pull_metrics.csv")
+"""
+import sys
+import csv
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # upper bounds in seconds
+PROGRESS_INTERVAL = 1.0
+# Path segments followed by an id, e.g. /databases/<id>/collections/<id>
+ID_PARENTS = {"databases", "collections", "documents", "indexes", "buckets", "files", "functions", "deployments", "executions"}
+
+
+def endpoint(method, path):
+    segments = path.strip("/").split("/")
+    for i in range(1, len(segments)):
+        if segments[i - 1] in ID_PARENTS:
+            segments[i] = "{id}"
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+
+class Histogram:
+    """Latencies counted in LATENCY_BUCKETS, percentiles are the upper bound of their bucket."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(LATENCY_BUCKETS)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction):
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(LATENCY_BUCKETS[i], self.max) if i < len(LATENCY_BUCKETS) else self.max
+        return 0.0
+
+    def to_dict(self):
+        labels = [f"le_{bound}" for bound in LATENCY_BUCKETS] + ["le_inf"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+class Metrics:
+    """Counters shared by every thread of the process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = {}  # endpoint -> {"latency", "statuses", "bytes_sent", "bytes_received"}
+        self.stages = {}  # name -> [seconds, calls]
+        self.documents = {}  # (collection, "read" or "written") -> [count, first seen, last seen]
+        self.progress_stop = None
+
+    def record_request(self, method, path, seconds, status, sent, received):
+        """`status` is None when no response arrived."""
+        name = endpoint(method, path)
+        with self.lock:
+            entry = self.requests.get(name)
+            if entry is None:
+                entry = self.requests[name] = {"latency": Histogram(), "statuses": {}, "bytes_sent": 0, "bytes_received": 0}
+            entry["latency"].add(seconds)
+            status = str(status) if status is not None else "none"
+            entry["statuses"][status] = entry["statuses"].get(status, 0) + 1
+            entry["bytes_sent"] += sent
+            entry["bytes_received"] += received
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            with self.lock:
+                entry = self.stages.setdefault(name, [0.0, 0])
+                entry[0] += seconds
+                entry[1] += 1
+
+    def count_documents(self, kind, collection, count):
+        """Add `count` documents "read" or "written", the first call (count 0 is fine) starts the clock."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.documents.setdefault((collection, kind), [0, now, now])
+            entry[0] += count
+            entry[2] = now
+
+    def report(self):
+        with self.lock:
+            collections = {}
+            for (collection, kind), (count, first, last) in sorted(self.documents.items()):
+                collections.setdefault(collection, {})[kind] = {
+                    "documents": count,
+                    "seconds": last - first,
+                    "per_second": count / (last - first) if last > first else None
+                }
+            return {
+                "seconds": time.monotonic() - self.started,
+                "requests": {
+                    name: {
+                        "latency": entry["latency"].to_dict(),
+                        "statuses": dict(entry["statuses"]),
+                        "bytes_sent": entry["bytes_sent"],
+                        "bytes_received": entry["bytes_received"]
+                    }
+                    for name, entry in sorted(self.requests.items())
+                },
+                "stages": {
+                    name: {"seconds": seconds, "calls": calls}
+                    for name, (seconds, calls) in sorted(self.stages.items())
+                },
+                "collections": collections
+            }
+
+    def write_report(self, path):
+        """JSON, or CSV rows of (section, name, metric, value) when `path` ends in .csv."""
+        report = self.report()
+        if not path.endswith(".csv"):
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            return
+        rows = [("run", "", "seconds", report["seconds"])]
+        for name, entry in report["requests"].items():
+            for metric, value in entry["latency"].items():
+                if metric == "buckets":
+                    rows.extend(("request", name, f"latency_{label}", count) for label, count in value.items())
+                else:
+                    rows.append(("request", name, f"latency_{metric}", value))
+            rows.extend(("request", name, f"status_{status}", count) for status, count in entry["statuses"].items())
+            rows.append(("request", name, "bytes_sent", entry["bytes_sent"]))
+            rows.append(("request", name, "bytes_received", entry["bytes_received"]))
+        for name, entry in report["stages"].items():
+            rows.extend(("stage", name, metric, value) for metric, value in entry.items())
+        for collection, kinds in report["collections"].items():
+            for kind, entry in kinds.items():
+                rows.extend(("collection", collection, f"{kind}_{metric}", value) for metric, value in entry.items())
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("section", "name", "metric", "value"))
+            writer.writerows(rows)
+
+    def progress_line(self):
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            requests = sum(entry["latency"].count for entry in self.requests.values())
+            received = sum(entry["bytes_received"] for entry in self.requests.values())
+            sent = sum(entry["bytes_sent"] for entry in self.requests.values())
+            read = sum(count for (_, kind), (count, _, _) in self.documents.items() if kind == "read")
+            written = sum(count for (_, kind), (count, _, _) in self.documents.items() if kind == "written")
+        return (
+            f"📈 {elapsed:.0f}s | {requests} requests ({requests / elapsed:.1f}/s) | "
+            f"read {read} docs ({read / elapsed:.0f}/s) | written {written} docs ({written / elapsed:.0f}/s) | "
+            f"{received / 1e6:.1f} MB in, {sent / 1e6:.1f} MB out"
+        )
+
+    def start_progress(self, interval=PROGRESS_INTERVAL):
+        """Rewrite one progress line on stderr every `interval` seconds until stop_progress()."""
+        self.progress_stop = threading.Event()
+
+        def run(stop):
+            while not stop.wait(interval):
+                sys.stderr.write("\r" + self.progress_line())
+                sys.stderr.flush()
+
+        threading.Thread(target=run, args=(self.progress_stop,), daemon=True).start()
+
+    def stop_progress(self):
+        if self.progress_stop is not None:
+            self.progress_stop.set()
+            self.progress_stop = None
+            sys.stderr.write("\r" + self.progress_line() + "\n")
+            sys.stderr.flush()
+
+
+# One per process, PooledClient and the tools all record into it
+metrics = Metrics()
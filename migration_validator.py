@@ -5,24 +5,74 @@ python migration_validator.py --pull --output prod_snapshot.json
 # Compare two pulled project states and print migration diff
 python migration_validator.py --compare --source prod_snapshot.json --destination staging_snapshot.json
 
+# Compare two live projects in seconds: counts, attributes and 300 sampled documents per collection and side
+python migration_validator.py --compare --sample 300 --from-env prod --to-env stage --workers 8
+
 # With resume and checkpointing logic to resume from in between
 python migration_validator.py --pull --output des_snapshot.json --resume
 
+# Bigger pages (cursor paging is the default, --pagination offset restores the old behaviour)
+python migration_validator.py --pull --output prod_snapshot.json --page-size 1000
+
+# Pull 8 collections at a time, never more than 50 requests per second in total
+python migration_validator.py --pull --output prod_snapshot.json --workers 8 --rps 50
+
+# Only download two attributes of every collection
+python migration_validator.py --pull --output prod_snapshot.json --fields title,status
+
+# Gzip-compressed columnar snapshot, --compare and --seed read it one collection at a time
+python migration_validator.py --pull --format columnar --output prod_snapshot.awc
+
+# Nightly delta: only documents updated since last night's snapshot are downloaded and merged into it
+python migration_validator.py --pull --previous prod_snapshot_mon.json --output prod_snapshot_tue.json
+
+# Stream documents to a directory (manifest.json + <db>/<collection>.jsonl), memory stays bounded by the page size
+python migration_validator.py --pull --format jsonl --output prod_snapshot
+
+# Where a pull spends its time: latency histograms per endpoint, bytes, docs/s per collection and local stage timings
+python migration_validator.py --pull --output prod_snapshot.json --workers 8 --metrics-out pull_metrics.csv --progress
+
 # seedin appwrite from the json
 python migration_validator.py --seed prod_snapshot.json
+
+# seed documents in batches of 500, 4 batches in flight per collection
+python migration_validator.py --seed prod_snapshot.json --batch-size 500 --batch-workers 4
+
+# seed 8 collections at a time, each one writes its documents as soon as its attributes are available
+python migration_validator.py --seed prod_snapshot.json --workers 8
+
+# copy bucket files too: download them once per checksum into a local store, upload them when seeding
+python migration_validator.py --pull --output prod_snapshot.json --files-dir prod_files
+python migration_validator.py --seed prod_snapshot.json --files-dir prod_files
+
+# continue a seed that stopped halfway, from the first batch it had not written
+python migration_validator.py --seed prod_snapshot.json --resume
+
+# copy prod (.env.prod or PROD_APPWRITE_* variables) straight into stage, reading and writing at the same time
+python migration_validator.py --migrate --from-env prod --to-env stage --workers 4 --batch-workers 4
 """
 import os
 import time
 import json
+import queue
+import shutil
 import argparse
-from dotenv import load_dotenv
-from appwrite.client import Client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv, dotenv_values
 from appwrite.services.databases import Databases
 from appwrite.services.functions import Functions
 from appwrite.services.storage import Storage
 from deepdiff import DeepDiff
 from appwrite.query import Query
-import pickle
+from appwrite_transport import PooledClient, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from rate_control import AdaptiveLimiter, retry_call
+from bulk import upload_batches, iter_document_pages, is_conflict, DEFAULT_BATCH_SIZE, MAX_PAGE_SIZE
+from file_store import ContentStore, download_files, upload_files
+from snapshot_store import attach_jsonl_documents, is_columnar_snapshot, read_columnar_snapshot, write_columnar_snapshot
+from metrics import metrics
+from live_sample import sample_collection, is_match, format_count, DEFAULT_SAMPLE
+from snapshot_diff import Fingerprint, diff_documents, diff_fingerprinted, has_differences, DEFAULT_SAMPLE_SIZE
 
 # Load .env
 load_dotenv()
@@ -31,127 +81,455 @@ PROJECT_ID = os.environ.get("APPWRITE_PROJECT_ID")
 API_KEY = os.environ.get("APPWRITE_API_KEY")
 SEED_FUNCTIONS = False
 SEED_STORAGE = False
+DEFAULT_PAGE_SIZE = 100
+SNAPSHOT_MANIFEST = "manifest.json"
+KEPT_SYSTEM_KEYS = ("$id", "$sequence")
+MIGRATE_QUEUE_PAGES = 4  # pages read ahead of the writer during --migrate
+ATTRIBUTE_TIMEOUT = 300  # seconds an attribute may stay in processing while seeding
+ATTRIBUTE_POLL_MIN = 0.25
+ATTRIBUTE_POLL_MAX = 5
 
 # Appwrite Setup
-client = Client()
-client.set_endpoint(ENDPOINT).set_project(PROJECT_ID).set_key(API_KEY)
+client = PooledClient()
+if ENDPOINT:  # --migrate can take both projects from --from-env/--to-env instead
+    client.set_endpoint(ENDPOINT).set_project(PROJECT_ID).set_key(API_KEY)
 
 databases = Databases(client)
 functions = Functions(client)
 storage = Storage(client)
 
-def fetch_all_documents(db_id, col_id, resume=False, checkpoint_dir="checkpoints", logs=None):
+class JsonlSink:
+    """Appends the documents of one collection to a JSON Lines file as pages arrive."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.file = open(path, "ab")
+        self.count = 0
+
+    def truncate(self, position=0, count=0):
+        # Drop whatever was written after the last checkpoint. truncate() leaves the file
+        # position where it was, tell() must not report the old end until the next write
+        self.file.truncate(position)
+        self.file.seek(position)
+        self.count = count
+
+    def write(self, docs):
+        self.file.write("".join(json.dumps(doc) + "\n" for doc in docs).encode("utf-8"))
+        self.file.flush()
+        self.count += len(docs)
+
+    def sync(self):
+        os.fsync(self.file.fileno())
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class Watermark:
+    """Highest $updatedAt seen in a collection, the starting point of the next delta pull."""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def update(self, docs):
+        for doc in docs:
+            updated_at = doc.get("$updatedAt")
+            if updated_at and (self.value is None or updated_at > self.value):
+                self.value = updated_at
+
+
+class SeedJournal:
+    """
+    Append-only JSON Lines record of what a seed created: databases, collections, attributes,
+    document batches and collections whose documents are all written. A resumed seed skips
+    everything recorded here.
+    """
+
+    def __init__(self, path, resume=False):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.entries = set()
+        self.batches = {}  # (db_id, col_id) -> {batch index: documents uploaded}
+        self.batch_size = None
+        self.lock = threading.Lock()
+        position = 0
+        if resume and os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn last line of a crashed run
+                    self.load(entry)
+                    position += len(line)
+        self.file = open(path, "ab")
+        self.file.truncate(position)
+
+    def load(self, entry):
+        kind, ids = entry["kind"], tuple(entry.get("ids", ()))
+        if kind == "seed":
+            self.batch_size = entry["batch_size"]
+        elif kind == "batch":
+            self.batches.setdefault(ids, {})[entry["index"]] = entry["uploaded"]
+        else:
+            self.entries.add((kind, *ids))
+
+    def done(self, kind, *ids):
+        return (kind, *ids) in self.entries
+
+    def record(self, kind, *ids, **fields):
+        entry = {"kind": kind, "ids": list(ids), **fields}
+        with self.lock:
+            self.file.write((json.dumps(entry) + "\n").encode("utf-8"))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.load(entry)
+
+    def close(self):
+        self.file.close()
+
+
+def write_checkpoint(path, checkpoint):
+    """Replace the checkpoint header atomically, a crash leaves either the old or the new one."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def fetch_all_documents(db_id, col_id, resume=False, checkpoint_dir="checkpoints", logs=None,
+                        page_size=DEFAULT_PAGE_SIZE, pagination="cursor", sink=None, fingerprint=None, select=None,
+                        watermark=None, filters=None):
+    """
+    Page through a collection. Documents are returned as a list, or written to `sink`
+    page by page (and not kept in memory) when one is given.
+
+    Checkpoints are append-only: each page goes to a JSON Lines page log (the sink itself
+    when there is one) and a small header records the cursor and how much of the log is
+    valid. Resume truncates the log to that length and replays it.
+
+    A `fingerprint` is updated with every page and saved in the checkpoint header.
+    `select` limits the attributes the server sends back (see select_fields), `filters` are
+    extra queries such as the $updatedAt bound of a delta pull. A `watermark` tracks the
+    highest $updatedAt, it is read before system keys are dropped.
+    """
     if logs is None:
         logs = []
     all_docs = []
-    limit = 100
+    limit = max(1, min(page_size, MAX_PAGE_SIZE))
     offset = 0
-    allowed_keys = {"$id", "$sequence"}
-    checkpoint_file = os.path.join(checkpoint_dir, f"checkpoint_{db_id}_{col_id}.pkl")
+    cursor = None
+    checkpoint_file = os.path.join(checkpoint_dir, f"checkpoint_{db_id}_{col_id}.json")
     completed = False
 
-    # Resume logic
-    if resume and os.path.exists(checkpoint_file):
-        with open(checkpoint_file, "rb") as f:
-            checkpoint = pickle.load(f)
-            all_docs = checkpoint.get("all_docs", [])
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    page_log = sink
+    if page_log is None:
+        page_log = JsonlSink(os.path.join(checkpoint_dir, f"checkpoint_{db_id}_{col_id}.pages.jsonl"))
+
+    try:
+        # Resume logic
+        if resume and os.path.exists(checkpoint_file):
+            with open(checkpoint_file, "r") as f:
+                checkpoint = json.load(f)
             offset = checkpoint.get("offset", 0)
-            logs = checkpoint.get("logs", logs)
+            cursor = checkpoint.get("cursor")
             completed = checkpoint.get("completed", False)
-        logs.append(f"[RESUME] Resuming {db_id}/{col_id} from offset {offset}")
-    else:
-        logs.append(f"{db_id}/{col_id} started")
+            page_log.truncate(checkpoint.get("position", 0), offset)
+            if fingerprint is not None:
+                fingerprint.restore(checkpoint.get("fingerprint"))
+            if watermark is not None:
+                watermark.value = checkpoint.get("watermark")
+            if sink is None:
+                with open(page_log.path, "r") as f:
+                    all_docs = [json.loads(line) for line in f]
+            position = f"cursor {cursor}" if cursor else f"offset {offset}"
+            logs.append(f"[RESUME] Resuming {db_id}/{col_id} from {position}")
+            if completed:
+                return all_docs, logs, completed
+        else:
+            page_log.truncate()
+            logs.append(f"{db_id}/{col_id} started")
+        metrics.count_documents("read", f"{db_id}/{col_id}", 0)
 
-    os.makedirs(checkpoint_dir, exist_ok=True)
+        while True:
+            try:
+                queries = [Query.limit(limit), Query.order_desc("")]
+                if select:
+                    queries.append(Query.select(select))
+                queries.extend(filters or [])
+                # Cursor paging keeps every page O(limit) on the server. Offset is used in
+                # offset mode or when resuming a checkpoint that was saved without a cursor.
+                if pagination == "cursor" and cursor:
+                    queries.append(Query.cursor_after(cursor))
+                elif offset:
+                    queries.append(Query.offset(offset))
+                result = retry_call(
+                    databases.list_documents,
+                    database_id=db_id,
+                    collection_id=col_id,
+                    queries=queries
+                )
+                docs = result.get("documents", [])
+                if not docs:
+                    completed = True
+                    logs.append(f"{db_id}/{col_id} ended")
+                    break
 
-    while True:
-        try:
-            result = databases.list_documents(
-                database_id=db_id,
-                collection_id=col_id,
-                queries=[Query.limit(limit), Query.offset(offset), Query.order_desc("")]
-            )
-            docs = result.get("documents", [])
-            if not docs:
-                completed = True
-                logs.append(f"{db_id}/{col_id} ended")
-                break
+                metrics.count_documents("read", f"{db_id}/{col_id}", len(docs))
+                if watermark is not None:
+                    watermark.update(docs)
 
-            # Append only schema fields (excluding Appwrite system keys like $id)
-            all_docs.extend([
-                {k: v for k, v in doc.items() if not k.startswith('$') or k in allowed_keys}
-                for doc in docs
-            ])
-            offset += limit
-            logs.append(f"{db_id}/{col_id}: {offset} docs done")
-
-            # Save checkpoint every 100 docs
-            with open(checkpoint_file, "wb") as f:
-                pickle.dump({
-                    "all_docs": all_docs,
-                    "offset": offset,
-                    "logs": logs,
-                    "completed": False
-                }, f)
-        except Exception as e:
-            logs.append(f"⚠️ Failed to fetch documents from {col_id}: {e}")
-            break
+                # Append only schema fields (excluding Appwrite system keys like $id)
+                with metrics.stage("strip_system_keys"):
+                    page = [strip_system_keys(doc) for doc in docs]
+                with metrics.stage("serialize"):
+                    page_log.write(page)
+                if fingerprint is not None:
+                    with metrics.stage("fingerprint"):
+                        fingerprint.update(page)
+                if sink is None:
+                    all_docs.extend(page)
+                offset += len(docs)
+                cursor = docs[-1]["$id"]
+                logs.append(f"{db_id}/{col_id}: {offset} docs done")
 
-    # Final checkpoint with completion status
-    with open(checkpoint_file, "wb") as f:
-        pickle.dump({
-            "all_docs": all_docs,
+                # Page must be on disk before the header points past it
+                with metrics.stage("checkpoint"):
+                    page_log.sync()
+                    write_checkpoint(checkpoint_file, {
+                        "offset": offset,
+                        "cursor": cursor if pagination == "cursor" else None,
+                        "position": page_log.tell(),
+                        "fingerprint": fingerprint.to_dict() if fingerprint is not None else None,
+                        "watermark": watermark.value if watermark is not None else None,
+                        "completed": False
+                    })
+
+                # A short page is the last one, no need to ask for an empty page
+                if len(docs) < limit:
+                    completed = True
+                    logs.append(f"{db_id}/{col_id} ended")
+                    break
+            except Exception as e:
+                logs.append(f"⚠️ Failed to fetch documents from {col_id}: {e}")
+                break
+
+        # Final checkpoint with completion status
+        write_checkpoint(checkpoint_file, {
             "offset": offset,
-            "logs": logs,
+            "cursor": cursor if pagination == "cursor" else None,
+            "position": page_log.tell(),
+            "fingerprint": fingerprint.to_dict() if fingerprint is not None else None,
+            "watermark": watermark.value if watermark is not None else None,
             "completed": completed
-        }, f)
+        })
+    finally:
+        if page_log is not sink:
+            page_log.close()
     return all_docs, logs, completed
 
 
-def pull_full_project_state(resume=False, checkpoint_dir="checkpoints"):
+def strip_system_keys(doc):
+    """Schema fields of a document, Appwrite system keys dropped except $id and $sequence."""
+    return {k: v for k, v in doc.items() if not k.startswith('$') or k in KEPT_SYSTEM_KEYS}
+
+
+def list_all(list_fn, key, **kwargs):
+    """Collect every item of an Appwrite list endpoint instead of only its default first page of 25."""
+    items = []
+    while True:
+        page = retry_call(list_fn, queries=[Query.limit(DEFAULT_PAGE_SIZE), Query.offset(len(items))], **kwargs)[key]
+        items.extend(page)
+        if len(page) < DEFAULT_PAGE_SIZE:
+            return items
+
+
+def select_fields(attributes, fields=None):
+    """
+    Attributes to request with Query.select: `fields` when given, otherwise every attribute
+    of the collection (relationships with their related documents), plus the kept system keys.
+    """
+    if fields is None:
+        fields = [
+            f"{attr['key']}.*" if attr.get("type") == "relationship" else attr["key"]
+            for attr in attributes
+        ]
+    return ["$id", "$sequence", "$updatedAt", *fields]
+
+
+def fetch_document_ids(db_id, col_id):
+    """Every $id of a collection, pages of MAX_PAGE_SIZE with nothing but the id selected."""
+    ids = set()
+    cursor = None
+    while True:
+        queries = [Query.limit(MAX_PAGE_SIZE), Query.select(["$id"])]
+        if cursor:
+            queries.append(Query.cursor_after(cursor))
+        docs = retry_call(databases.list_documents, database_id=db_id, collection_id=col_id, queries=queries)["documents"]
+        ids.update(doc["$id"] for doc in docs)
+        if len(docs) < MAX_PAGE_SIZE:
+            return ids
+        cursor = docs[-1]["$id"]
+
+
+def fetch_delta(db_id, col_id, previous, resume=False, checkpoint_dir="checkpoints", page_size=DEFAULT_PAGE_SIZE,
+                pagination="cursor", select=None, watermark=None):
+    """
+    Documents of a collection rebuilt from its previous snapshot: only documents updated since the
+    previous watermark are downloaded, deletions are found from an $id-only listing.
+    When the delta fails the previous documents are returned unchanged, not completed.
+    """
+    mark = previous["updated_watermark"]
+    watermark.value = mark
+    # >= rather than >, a write in the same millisecond as the mark must not be missed
+    changed, logs, completed = fetch_all_documents(
+        db_id, col_id, resume=resume, checkpoint_dir=os.path.join(checkpoint_dir, "delta"), page_size=page_size,
+        pagination=pagination, select=select, watermark=watermark,
+        filters=[Query.greater_than_equal("$updatedAt", mark)]
+    )
+    if not completed:
+        return list(previous.get("documents", [])), logs, False
+
+    live_ids = fetch_document_ids(db_id, col_id)
+    changed_by_id = {doc["$id"]: doc for doc in changed}
+    docs = []
+    deleted = 0
+    for doc in previous.get("documents", []):
+        if doc["$id"] not in live_ids:
+            deleted += 1
+        elif doc["$id"] not in changed_by_id:
+            docs.append(doc)
+        else:
+            docs.append(changed_by_id.pop(doc["$id"]))
+    docs.extend(changed_by_id.values())
+    logs.append(f"{db_id}/{col_id}: {len(changed)} changed, {deleted} deleted since {mark}")
+    return docs, logs, True
+
+
+def pull_collection(db_id, col, resume=False, checkpoint_dir="checkpoints", page_size=DEFAULT_PAGE_SIZE, pagination="cursor",
+                    snapshot_dir=None, fields=None, previous=None):
+    """
+    Pull attributes and documents of one collection. Logs are kept per collection so workers don't interleave.
+    With `snapshot_dir` the documents are streamed to `<snapshot_dir>/<db_id>/<col_id>.jsonl` instead of
+    being returned in the collection dict. Only the collection's attributes (or `fields`)
+    are downloaded. With the `previous` pull of the collection only its changes are fetched.
+    """
+    col_id = col["$id"]
+    logs = []
+    col_data = {
+        "name": col["name"],
+        "attributes": [],
+        "documents": []
+    }
+    select = select_fields([], fields) if fields is not None else None
+    try:
+        col_data["attributes"] = list_all(databases.list_attributes, "attributes", database_id=db_id, collection_id=col_id)
+        select = select_fields(col_data["attributes"], fields)
+    except Exception as e:
+        # Without the attribute list whole documents are downloaded
+        logs.append(f"⚠️ Couldn't fetch attributes for {col_id}: {e}")
+    completed = False
+    fingerprint = Fingerprint()
+    watermark = Watermark()
+    sink = None
+    if snapshot_dir:
+        documents_file = os.path.join(db_id, f"{col_id}.jsonl")
+        sink = JsonlSink(os.path.join(snapshot_dir, documents_file))
+        del col_data["documents"]
+        col_data["documents_file"] = documents_file
+    try:
+        if previous and previous.get("updated_watermark"):
+            docs, doc_logs, completed = fetch_delta(
+                db_id, col_id, previous, resume=resume, checkpoint_dir=checkpoint_dir, page_size=page_size,
+                pagination=pagination, select=select, watermark=watermark
+            )
+            fingerprint.update(docs)
+            if sink is not None:
+                sink.truncate()
+                sink.write(docs)
+        else:
+            docs, doc_logs, completed = fetch_all_documents(
+                db_id, col_id, resume=resume, checkpoint_dir=checkpoint_dir,
+                page_size=page_size, pagination=pagination, sink=sink, fingerprint=fingerprint, select=select,
+                watermark=watermark
+            )
+        if sink is None:
+            col_data["documents"] = docs
+        col_data["fingerprint"] = fingerprint.to_dict()
+        # A partial pull has not seen every document older than its highest $updatedAt,
+        # without a watermark the next --previous run pulls the collection in full
+        col_data["updated_watermark"] = watermark.value if completed else None
+        logs.extend(doc_logs)
+    except Exception as e:
+        logs.append(f"⚠️ Couldn't fetch documents for {col_id}: {e}")
+    finally:
+        if sink is not None:
+            col_data["document_count"] = sink.count
+            sink.close()
+    logs.append(f"Collection {col['name']} ended")
+    return col_data, logs, completed
+
+
+def previous_collection(previous, db_id, col_id):
+    if previous is None:
+        return None
+    return previous.get("databases", {}).get(db_id, {}).get("collections", {}).get(col_id)
+
+
+def pull_full_project_state(resume=False, checkpoint_dir="checkpoints", page_size=DEFAULT_PAGE_SIZE, pagination="cursor", workers=1,
+                            snapshot_dir=None, fields=None, previous=None, files_dir=None, file_workers=1):
     project = {
         "databases": {},
         "functions": [],
         "storage": {
             "buckets": {}
         },
-        "completed": False
+        "completed": False,
+        "incomplete_collections": []
     }
     completed_resources = []
     logs = []  # logs are now only in memory, not in project dict
 
     # Databases
     try:
-        dbs = databases.list()["databases"]
-        for db in dbs:
-            db_id = db["$id"]
-            db_data = {"name": db["name"], "collections": {}}
-            logs.append(f"Database {db['name']} started")
-            collections = databases.list_collections(database_id=db_id)["collections"]
-            for col in collections:
-                col_id = col["$id"]
-                col_data = {
-                    "name": col["name"],
-                    "attributes": [],
-                    "documents": []
-                }
-                try:
-                    attr = databases.list_attributes(database_id=db_id, collection_id=col_id)
-                    col_data["attributes"] = attr.get("attributes", [])
-                except Exception as e:
-                    logs.append(f"⚠️ Couldn't fetch attributes for {col_id}: {e}")
-                try:
-                    docs, doc_logs, completed = fetch_all_documents(db_id, col_id, resume=resume, checkpoint_dir=checkpoint_dir)
-                    col_data["documents"] = docs
-                    logs.extend(doc_logs)
+        dbs = list_all(databases.list, "databases")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            # Schedule every collection up front, then collect in listing order so the
+            # snapshot and the logs look the same whatever the number of workers.
+            pending = []
+            for db in dbs:
+                collections = list_all(databases.list_collections, "collections", database_id=db["$id"])
+                futures = [
+                    (col, executor.submit(
+                        pull_collection, db["$id"], col, resume=resume, checkpoint_dir=checkpoint_dir,
+                        page_size=page_size, pagination=pagination, snapshot_dir=snapshot_dir, fields=fields,
+                        previous=previous_collection(previous, db["$id"], col["$id"])
+                    ))
+                    for col in collections
+                ]
+                pending.append((db, futures))
+
+            for db, futures in pending:
+                db_id = db["$id"]
+                db_data = {"name": db["name"], "collections": {}}
+                logs.append(f"Database {db['name']} started")
+                for col, future in futures:
+                    col_data, col_logs, completed = future.result()
+                    logs.extend(col_logs)
                     if completed:
                         completed_resources.append(f"{db['name']}::{col['name']}")
-                except Exception as e:
-                    logs.append(f"⚠️ Couldn't fetch documents for {col_id}: {e}")
-                db_data["collections"][col_id] = col_data
-                logs.append(f"Collection {col['name']} ended")
-            project["databases"][db_id] = db_data
-            logs.append(f"Database {db['name']} ended")
+                    else:
+                        project["incomplete_collections"].append(f"{db_id}/{col['$id']}")
+                    db_data["collections"][col["$id"]] = col_data
+                project["databases"][db_id] = db_data
+                logs.append(f"Database {db['name']} ended")
     except Exception as e:
         logs.append(f"❌ Error fetching databases: {e}")
 
@@ -165,10 +543,11 @@ def pull_full_project_state(resume=False, checkpoint_dir="checkpoints"):
     except Exception as e:
         logs.append(f"⚠️ Couldn't fetch functions: {e}")
 
-    # Storage Buckets
+    # Storage Buckets, file contents go to the content store of `files_dir` when there is one
     logs.append("Storage started")
     try:
-        buckets = storage.list_buckets()["buckets"]
+        buckets = list_all(storage.list_buckets, "buckets")
+        listed = []
         for bucket in buckets:
             bucket_id = bucket["$id"]
             bucket_data = {
@@ -176,14 +555,36 @@ def pull_full_project_state(resume=False, checkpoint_dir="checkpoints"):
                 "files": []
             }
             try:
-                files = storage.list_files(bucket_id=bucket_id)["files"]
+                files = list_all(storage.list_files, "files", bucket_id=bucket_id)
                 bucket_data["files"] = [
-                    {"$id": f["$id"], "name": f["name"], "sizeOriginal": f["sizeOriginal"]} for f in files
+                    {
+                        "$id": f["$id"], "name": f["name"], "sizeOriginal": f["sizeOriginal"],
+                        "signature": f["signature"], "mimeType": f["mimeType"], "$permissions": f["$permissions"]
+                    }
+                    for f in files
                 ]
-                completed_resources.append(f"bucket::{bucket['name']}")
+                listed.append(bucket)
             except Exception as fe:
                 logs.append(f"⚠️ Couldn't fetch files in bucket {bucket_id}: {fe}")
             project["storage"]["buckets"][bucket_id] = bucket_data
+
+        failed_buckets = set()
+        if files_dir:
+            files = [
+                (bucket["$id"], f) for bucket in listed for f in project["storage"]["buckets"][bucket["$id"]]["files"]
+            ]
+            report = download_files(storage, ContentStore(files_dir), files, workers=file_workers)
+            logs.append(
+                f"Files: {report['downloaded']} downloaded ({report['bytes'] / 1024 / 1024:.1f} MB), "
+                f"{report['reused']} with contents already in {files_dir}"
+            )
+            failed_ids = {row["$id"] for row in report["failed"]}
+            for row in report["failed"]:
+                logs.append(f"⚠️ Couldn't download file {row['$id']}: {row['error']}")
+            failed_buckets = {bucket_id for bucket_id, f in files if f["$id"] in failed_ids}
+        for bucket in listed:
+            if bucket["$id"] not in failed_buckets:
+                completed_resources.append(f"bucket::{bucket['name']}")
         logs.append("Storage ended")
     except Exception as e:
         logs.append(f"⚠️ Couldn't fetch storage buckets: {e}")
@@ -193,217 +594,653 @@ def pull_full_project_state(resume=False, checkpoint_dir="checkpoints"):
     project["completed_resources"] = completed_resources
     return project, logs
 
-def wait_for_collection_ready(db_id, col_id, timeout=10):
-    """Wait until all attributes in the collection are indexed."""
-    start = time.time()
-    while time.time() - start < timeout:
+def create_attribute(databases, db_id, col_id, attr):
+    """Create one attribute from its snapshot description."""
+    attr_type = attr["type"]
+    attr_id = attr["key"]
+    attr_required = attr.get("required", False)
+    attr_default = attr.get("default")
+    if attr_type == "string":
+        databases.create_string_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            size=attr.get("size", 255),
+            required=attr_required,
+            default=attr_default,
+            array=attr.get("array", False)
+        )
+    elif attr_type == "integer":
+        databases.create_integer_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            required=attr_required,
+            default=attr_default,
+            min=attr.get("min"),
+            max=attr.get("max"),
+            array=attr.get("array", False)
+        )
+    elif attr_type == "float":
+        databases.create_float_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            required=attr_required,
+            default=attr_default,
+            min=attr.get("min"),
+            max=attr.get("max"),
+            array=attr.get("array", False)
+        )
+    elif attr_type == "boolean":
+        databases.create_boolean_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            required=attr_required,
+            default=attr_default,
+            array=attr.get("array", False)
+        )
+    elif attr_type == "email":
+        databases.create_email_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            required=attr_required,
+            default=attr_default,
+            array=attr.get("array", False)
+        )
+    elif attr_type == "url":
+        databases.create_url_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            required=attr_required,
+            default=attr_default,
+            array=attr.get("array", False)
+        )
+    elif attr_type == "ip":
+        databases.create_ip_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            required=attr_required,
+            default=attr_default,
+            array=attr.get("array", False)
+        )
+    elif attr_type == "enum":
+        databases.create_enum_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            elements=attr.get("elements", []),
+            required=attr_required,
+            default=attr_default,
+            array=attr.get("array", False)
+        )
+    elif attr_type == "datetime":
+        databases.create_datetime_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            key=attr_id,
+            required=attr_required,
+            default=attr_default,
+            array=attr.get("array", False)
+        )
+    elif attr_type == "relationship":
+        databases.create_relationship_attribute(
+            database_id=db_id,
+            collection_id=col_id,
+            related_collection_id=attr["relatedCollection"],
+            type=attr["relationType"],
+            key=attr_id,
+            two_way=attr.get("twoWay", False),
+            two_way_key=attr.get("twoWayKey"),
+            on_delete=attr.get("onDelete", "restrict")
+        )
+    else:
+        raise ValueError(f"Unknown attribute type {attr_type}")
+
+
+def wait_for_attributes(databases, db_id, col_id, keys, timeout=ATTRIBUTE_TIMEOUT):
+    """
+    Poll list_attributes until every attribute in `keys` is available, backing off exponentially
+    between polls. Returns the keys that failed on the server or were still processing at the timeout.
+    """
+    pending = set(keys)
+    failed = set()
+    delay = ATTRIBUTE_POLL_MIN
+    deadline = time.monotonic() + timeout
+    while pending:
         try:
-            collection = databases.get_collection(database_id=db_id, collection_id=col_id)
-            if collection["status"] == "available":
-                return True
-        except Exception:
-            pass
-        time.sleep(0.5)
-    print(f"⚠️ Timeout while waiting for collection {col_id} to become available")
-    return False
-
-
-def seed_from_snapshot(snapshot_path):
-    with open(snapshot_path, "r") as f:
-        snapshot = json.load(f)
+            attributes = list_all(databases.list_attributes, "attributes", database_id=db_id, collection_id=col_id)
+        except Exception as e:
+            print(f"⚠️ Failed to list attributes of {col_id}: {e}")
+            attributes = []
+        for attr in attributes:
+            if attr["key"] not in pending:
+                continue
+            if attr.get("status") == "available":
+                pending.discard(attr["key"])
+            elif attr.get("status") in ("failed", "stuck"):
+                print(f"⚠️ Attribute {attr['key']} in {col_id} is {attr['status']}: {attr.get('error', '')}")
+                pending.discard(attr["key"])
+                failed.add(attr["key"])
+        if not pending:
+            break
+        if time.monotonic() + delay > deadline:
+            print(f"⚠️ Timeout while waiting for attributes {', '.join(sorted(pending))} of {col_id}")
+            return failed | pending
+        time.sleep(delay)
+        delay = min(delay * 2, ATTRIBUTE_POLL_MAX)
+    return failed
+
+
+def is_child_side(attr):
+    # The related collection's half of a two-way relationship, Appwrite creates it with the parent half
+    return attr.get("type") == "relationship" and attr.get("side") == "child"
+
+
+def seeding_waves(snapshot):
+    """
+    Group the (db_id, col_id) of every collection into waves, each collection coming after the
+    collections its relationships point to. Collections left in a relationship cycle, and those
+    depending on one, share the last wave.
+    """
+    depends_on = {}
+    for db_id, db_data in snapshot.get("databases", {}).items():
+        collections = db_data.get("collections", {})
+        for col_id, col_data in collections.items():
+            depends_on[(db_id, col_id)] = {
+                (db_id, attr["relatedCollection"])
+                for attr in col_data.get("attributes", [])
+                if attr.get("type") == "relationship" and not is_child_side(attr)
+                and attr.get("relatedCollection") in collections and attr["relatedCollection"] != col_id
+            }
+
+    waves = []
+    seeded = set()
+    remaining = list(depends_on)
+    while remaining:
+        wave = [node for node in remaining if depends_on[node] <= seeded]
+        if not wave:
+            print(f"⚠️ Relationship cycle between {', '.join(col_id for _, col_id in remaining)}, seeding them together")
+            waves.append(remaining)
+            break
+        waves.append(wave)
+        seeded.update(wave)
+        remaining = [node for node in remaining if node not in seeded]
+    return waves
+
 
+def seed_resource(journal, entry, create):
+    """
+    Call `create` unless `entry` is in the journal, then journal it. A resource the server
+    already has (409) counts as created. Returns True only when this call created it.
+    """
+    if journal.done(*entry):
+        return False
+    try:
+        retry_call(create)
+    except Exception as e:
+        if not is_conflict(e):
+            raise
+        journal.record(*entry)
+        return False
+    journal.record(*entry)
+    return True
+
+
+def seed_attributes(databases, db_id, col_id, col_data, journal):
+    """
+    Create the attributes of one collection and wait until they are available.
+    Returns the created resources and the keys of its child-side relationship attributes.
+    """
     created_resources = []
+    keys = []
+    child_keys = set()
+    for attr in col_data.get("attributes", []):
+        if is_child_side(attr):
+            child_keys.add(attr["key"])
+            continue
+        try:
+            entry = ("attribute", db_id, col_id, attr["key"])
+            if seed_resource(journal, entry, lambda: create_attribute(databases, db_id, col_id, attr)):
+                created_resources.append(f"  └─ Attribute: {attr['key']} ({attr['type']})")
+            keys.append(attr["key"])
+        except Exception as e:
+            print(f"⚠️ Failed to create attribute {attr['key']} in {col_id}: {e}")
 
-    # Step 1: Databases and collections
+    not_ready = wait_for_attributes(databases, db_id, col_id, keys)
+    if not_ready:
+        print(f"⚠️ Seeding {col_id} without attributes {', '.join(sorted(not_ready))}, documents using them will fail")
+    return created_resources, child_keys
+
+
+def seed_collection(databases, db_id, col_id, col_data, journal, batch_size=DEFAULT_BATCH_SIZE, batch_workers=1,
+                    max_attempts=10):
+    """Create the attributes of one collection, wait until they are available, then write its documents."""
+    created_resources, child_keys = seed_attributes(databases, db_id, col_id, col_data, journal)
+
+    documents = col_data.get("documents", [])
+    if documents and not journal.done("documents", db_id, col_id):
+        if child_keys:
+            # The links are written from the parent side, whose collection is seeded later
+            documents = ({k: v for k, v in doc.items() if k not in child_keys} for doc in documents)
+        previous = dict(journal.batches.get((db_id, col_id), {}))
+
+        def on_batch(index, uploaded, failed):
+            # Batches with rows that were given up on are sent again by a resumed seed
+            if all(row["code"] == 409 for row in failed):
+                journal.record("batch", db_id, col_id, index=index, uploaded=uploaded)
+
+        report = upload_batches(
+            databases, db_id, col_id, documents,
+            batch_size=batch_size, workers=batch_workers, max_attempts=max_attempts,
+            skip_batches=previous, on_batch=on_batch
+        )
+        failed = [row for row in report["failed"] if row["code"] != 409]
+        existing = len(report["failed"]) - len(failed)
+        # Rows that already existed were written by an earlier run
+        uploaded = report["uploaded"] + sum(previous.values()) + existing
+        created_resources.append(f"  └─ Documents: {uploaded} in {col_id}")
+        if previous:
+            print(f"↪️ Skipped {len(previous)} batches of {col_id} written by the previous run")
+        if existing:
+            print(f"↪️ {existing} documents of {col_id} already existed")
+        for row in failed:
+            print(f"⚠️ Failed to create document {row['$id']} in {col_id}: {row['error']}")
+        if not failed:
+            journal.record("documents", db_id, col_id)
+    return created_resources
+
+
+def seed_databases(databases, snapshot, journal):
+    """Create every database and collection of a snapshot, without attributes."""
+    created_resources = []
     for db_id, db_data in snapshot.get("databases", {}).items():
         try:
-            databases.create(database_id=db_id, name=db_data["name"])
-            created_resources.append(f"Database: {db_data['name']} ({db_id})")
+            if seed_resource(journal, ("database", db_id),
+                             lambda: databases.create(database_id=db_id, name=db_data["name"])):
+                created_resources.append(f"Database: {db_data['name']} ({db_id})")
         except Exception as e:
             print(f"⚠️ Failed to create database {db_id}: {e}")
 
         for col_id, col_data in db_data.get("collections", {}).items():
             try:
-                databases.create_collection(
+                if seed_resource(journal, ("collection", db_id, col_id), lambda: databases.create_collection(
                     database_id=db_id,
                     collection_id=col_id,
                     name=col_data["name"]
-                )
-                created_resources.append(f"Collection: {col_data['name']} ({col_id})")
+                )):
+                    created_resources.append(f"Collection: {col_data['name']} ({col_id})")
             except Exception as e:
                 print(f"⚠️ Failed to create collection {col_id}: {e}")
+    return created_resources
 
-    # Step 2: Attributes
-    for db_id, db_data in snapshot.get("databases", {}).items():
-        for col_id, col_data in db_data.get("collections", {}).items():
-            for attr in col_data.get("attributes", []):
-                attr_type = attr["type"]
-                attr_id = attr["key"]
-                attr_required = attr.get("required", False)
-                attr_default = attr.get("default")
-                try:
-                    if attr_type == "string":
-                        databases.create_string_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            size=attr.get("size", 255),
-                            required=attr_required,
-                            default=attr_default,
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "integer":
-                        databases.create_integer_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            required=attr_required,
-                            default=attr_default,
-                            min=attr.get("min"),
-                            max=attr.get("max"),
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "float":
-                        databases.create_float_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            required=attr_required,
-                            default=attr_default,
-                            min=attr.get("min"),
-                            max=attr.get("max"),
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "boolean":
-                        databases.create_boolean_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            required=attr_required,
-                            default=attr_default,
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "email":
-                        databases.create_email_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            required=attr_required,
-                            default=attr_default,
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "url":
-                        databases.create_url_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            required=attr_required,
-                            default=attr_default,
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "ip":
-                        databases.create_ip_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            required=attr_required,
-                            default=attr_default,
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "enum":
-                        databases.create_enum_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            elements=attr.get("elements", []),
-                            required=attr_required,
-                            default=attr_default,
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "datetime":
-                        databases.create_datetime_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            key=attr_id,
-                            required=attr_required,
-                            default=attr_default,
-                            array=attr.get("array", False)
-                        )
-                    elif attr_type == "relationship":
-                        databases.create_relationship_attribute(
-                            database_id=db_id,
-                            collection_id=col_id,
-                            related_collection_id=attr["relatedCollection"],
-                            type=attr["relationType"],
-                            key=attr_id,
-                            two_way=attr.get("twoWay", False),
-                            two_way_key=attr.get("twoWayKey"),
-                            on_delete=attr.get("onDelete", "restrict")
-                        )
-                    else:
-                        print(f"⚠️ Unknown attribute type {attr_type} for key {attr_id}")
-                    created_resources.append(f"  └─ Attribute: {attr_id} ({attr_type})")
-                except Exception as e:
-                    print(f"⚠️ Failed to create attribute {attr_id} in {col_id}: {e}")
 
-    # Step 3: Wait for all collections to become ready
-    for db_id, db_data in snapshot.get("databases", {}).items():
-        for col_id in db_data.get("collections", {}):
-            wait_for_collection_ready(db_id, col_id)
+def seed_in_waves(snapshot, seed_fn, workers=1):
+    """
+    Run seed_fn(db_id, col_id, col_data) for every collection, `workers` at a time. A wave
+    starts once the collections its relationships point to are seeded.
+    """
+    created_resources = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for number, wave in enumerate(seeding_waves(snapshot), start=1):
+            print(f"🌊 Wave {number}: {', '.join(col_id for _, col_id in wave)}")
+            futures = [
+                executor.submit(seed_fn, db_id, col_id, snapshot["databases"][db_id]["collections"][col_id])
+                for db_id, col_id in wave
+            ]
+            for future in futures:
+                created_resources.extend(future.result())
+    return created_resources
 
-    # Step 4: Documents
-    for db_id, db_data in snapshot.get("databases", {}).items():
-        for col_id, col_data in db_data.get("collections", {}).items():
-            for doc in col_data.get("documents", []):
-                try:
-                    doc_id = doc.get("$id")
-                    databases.create_document(
-                        database_id=db_id,
-                        collection_id=col_id,
-                        document_id=doc_id,
-                        data={k: v for k, v in doc.items() if k != "$id"}
-                    )
-                    created_resources.append(f"  └─ Document: {doc_id}")
-                except Exception as e:
-                    print(f"⚠️ Failed to create document {doc_id}: {e}")
-
-    # Step 5: Functions
+
+def seed_from_snapshot(snapshot_path, batch_size=DEFAULT_BATCH_SIZE, batch_workers=1, max_attempts=10, workers=1,
+                       resume=False, checkpoint_dir="checkpoints", files_dir=None, file_workers=1):
+    """
+    Recreate a snapshot. Collections are seeded `workers` at a time in dependency waves, each
+    one creating its attributes, waiting for them and writing its documents without waiting
+    for the rest of its wave.
+
+    Progress goes to a SeedJournal in `checkpoint_dir`. With `resume` whatever it records is
+    skipped, down to the document batches already written.
+
+    With `files_dir`, the content store a pull downloaded into, buckets are recreated with
+    their files.
+    """
+    with metrics.stage("load_snapshot"):
+        snapshot = load_from_file(snapshot_path)
+    name = os.path.splitext(os.path.basename(os.path.normpath(snapshot_path)))[0]
+    journal = SeedJournal(os.path.join(checkpoint_dir, f"seed_{name}.jsonl"), resume)
+    if journal.batch_size is None:
+        journal.record("seed", batch_size=batch_size)
+    elif journal.batch_size != batch_size:
+        # Batch numbers only mean something with the batch size they were written with
+        print(f"↪️ Resuming with the journaled batch size {journal.batch_size} instead of {batch_size}")
+        batch_size = journal.batch_size
+
+    # Step 1: Databases and collections
+    created_resources = seed_databases(databases, snapshot, journal)
+
+    # Step 2: Attributes and documents, one pipeline per collection
+    created_resources.extend(seed_in_waves(
+        snapshot,
+        lambda db_id, col_id, col_data: seed_collection(
+            databases, db_id, col_id, col_data, journal, batch_size, batch_workers, max_attempts
+        ),
+        workers=workers
+    ))
+
+    # Step 3: Functions
     if SEED_FUNCTIONS:
         for fn in snapshot.get("functions", []):
             try:
-                functions.create(
+                if seed_resource(journal, ("function", fn["$id"]), lambda: functions.create(
                     function_id=fn["$id"],
                     name=fn["name"],
                     runtime=fn["runtime"]
-                )
-                created_resources.append(f"Function: {fn['name']}")
+                )):
+                    created_resources.append(f"Function: {fn['name']}")
             except Exception as e:
                 print(f"⚠️ Failed to create function {fn['name']}: {e}")
 
-    # Step 6: Buckets (Files not handled)
-    if SEED_STORAGE:
-        for bucket_id, bucket in snapshot.get("storage", {}).get("buckets", {}).items():
+    # Step 4: Buckets, and their files when there is a content store
+    if SEED_STORAGE or files_dir:
+        buckets = snapshot.get("storage", {}).get("buckets", {})
+        for bucket_id, bucket in buckets.items():
             try:
-                storage.create_bucket(bucket_id=bucket_id, name=bucket["name"])
-                created_resources.append(f"Bucket: {bucket['name']}")
+                if seed_resource(journal, ("bucket", bucket_id),
+                                 lambda: storage.create_bucket(bucket_id=bucket_id, name=bucket["name"])):
+                    created_resources.append(f"Bucket: {bucket['name']}")
             except Exception as e:
                 print(f"⚠️ Failed to create bucket {bucket['name']}: {e}")
 
+        if files_dir:
+            files = []
+            for bucket_id, bucket in buckets.items():
+                for file in bucket.get("files", []):
+                    if "signature" not in file:
+                        print(f"⚠️ File {file['$id']} has no signature, pull the snapshot again to copy its contents")
+                    elif not journal.done("file", bucket_id, file["$id"]):
+                        files.append((bucket_id, file))
+
+            def on_file(bucket_id, file, error):
+                if error is None or is_conflict(error):
+                    journal.record("file", bucket_id, file["$id"])
+
+            report = upload_files(storage, ContentStore(files_dir), files, workers=file_workers, on_file=on_file)
+            created_resources.append(f"  └─ Files: {report['uploaded']} ({report['bytes'] / 1024 / 1024:.1f} MB)")
+            for row in report["failed"]:
+                if row["code"] != 409:
+                    print(f"⚠️ Failed to upload file {row['$id']}: {row['error']}")
+
+    journal.close()
+    return created_resources
+
+def env_client(name):
+    """
+    PooledClient for the project of environment `name`: APPWRITE_ENDPOINT, APPWRITE_PROJECT_ID and
+    APPWRITE_API_KEY from `.env.<name>` when that file exists, otherwise from the same variables
+    prefixed with `<NAME>_` (e.g. PROD_APPWRITE_ENDPOINT).
+    """
+    path = f".env.{name}"
+    if os.path.exists(path):
+        values = dotenv_values(path)
+        source = path
+    else:
+        prefix = f"{name.upper()}_"
+        values = {key[len(prefix):]: value for key, value in os.environ.items() if key.startswith(prefix)}
+        source = f"{prefix}* environment variables"
+    missing = [key for key in ("APPWRITE_ENDPOINT", "APPWRITE_PROJECT_ID", "APPWRITE_API_KEY") if not values.get(key)]
+    if missing:
+        raise ValueError(f"{', '.join(missing)} not found in {source}")
+    return PooledClient().set_endpoint(values["APPWRITE_ENDPOINT"]).set_project(values["APPWRITE_PROJECT_ID"]).set_key(values["APPWRITE_API_KEY"])
+
+
+def read_schema(databases):
+    """Databases, collections and attributes of a project, in the shape of a snapshot without documents."""
+    schema = {"databases": {}}
+    for db in list_all(databases.list, "databases"):
+        collections = {}
+        for col in list_all(databases.list_collections, "collections", database_id=db["$id"]):
+            collections[col["$id"]] = {
+                "name": col["name"],
+                "attributes": list_all(databases.list_attributes, "attributes", database_id=db["$id"], collection_id=col["$id"])
+            }
+        schema["databases"][db["$id"]] = {"name": db["name"], "collections": collections}
+    return schema
+
+
+def migrate_collection(target, db_id, col_id, col_data, journal, checkpoint_file, resume=False,
+                       page_size=DEFAULT_PAGE_SIZE, batch_size=DEFAULT_BATCH_SIZE, batch_workers=1, max_attempts=10):
+    """
+    Create the attributes of one collection on `target`, then copy its documents page by page:
+    a reader thread pages the source into a bounded queue while the pages already read are
+    written to the target. The checkpoint holds the cursor of the last page fully written: it
+    stops moving at the first page with rows that failed, which a resumed run sends again.
+    """
+    created_resources, _ = seed_attributes(target, db_id, col_id, col_data, journal)
+    if journal.done("documents", db_id, col_id):
+        return created_resources
+
+    checkpoint = {"cursor": None, "count": 0}
+    if resume and os.path.exists(checkpoint_file):
+        with open(checkpoint_file, "r") as f:
+            checkpoint = json.load(f)
+        print(f"↪️ Resuming {col_id} after {checkpoint['count']} documents")
+    # Child-side relationship values are not read, the parent side's documents write the links
+    select = select_fields([attr for attr in col_data.get("attributes", []) if not is_child_side(attr)])
+    pages = queue.Queue(maxsize=MIGRATE_QUEUE_PAGES)
+    stop = threading.Event()
+
+    def put(item):
+        # Blocks while the writer is MIGRATE_QUEUE_PAGES behind, gives up once it has stopped
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def read():
+        try:
+            for page in iter_document_pages(databases, db_id, col_id, page_size, [Query.select(select)],
+                                            cursor=checkpoint["cursor"]):
+                put(page)
+        except Exception as e:
+            put(e)
+        else:
+            put(None)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    written = checkpoint["count"]
+    failed = 0
+    try:
+        while True:
+            page = pages.get()
+            if page is None:
+                break
+            if isinstance(page, Exception):
+                print(f"⚠️ Failed to read documents of {col_id}, resume with --resume: {page}")
+                created_resources.append(f"  └─ Documents: {written} in {col_id} (incomplete)")
+                return created_resources
+            with metrics.stage("strip_system_keys"):
+                docs = [strip_system_keys(doc) for doc in page]
+            report = upload_batches(
+                target, db_id, col_id, docs,
+                batch_size=batch_size, workers=batch_workers, max_attempts=max_attempts
+            )
+            page_failed = [row for row in report["failed"] if row["code"] != 409]
+            for row in page_failed:
+                print(f"⚠️ Failed to create document {row['$id']} in {col_id}: {row['error']}")
+            failed += len(page_failed)
+            # Rows that already exist were written by an earlier run
+            written += len(docs) - len(page_failed)
+            if not failed:
+                with metrics.stage("checkpoint"):
+                    write_checkpoint(checkpoint_file, {"cursor": page[-1]["$id"], "count": written})
+    finally:
+        stop.set()
+    if failed:
+        print(f"⚠️ {failed} documents of {col_id} failed, --resume sends them again")
+    else:
+        journal.record("documents", db_id, col_id)
+    created_resources.append(f"  └─ Documents: {written} in {col_id}" + (f", {failed} failed" if failed else ""))
+    return created_resources
+
+
+def migrate_project(target, name, resume=False, checkpoint_dir="checkpoints", page_size=DEFAULT_PAGE_SIZE,
+                    batch_size=DEFAULT_BATCH_SIZE, batch_workers=1, max_attempts=10, workers=1):
+    """
+    Copy the databases of the source project (the module's `databases`) to the `target` Databases
+    service without a snapshot file in between. The schema is seeded like seed_from_snapshot,
+    documents go through migrate_collection. `name` keeps the journal and checkpoints of
+    different migrations apart.
+    """
+    schema = read_schema(databases)
+    journal = SeedJournal(os.path.join(checkpoint_dir, f"migrate_{name}.jsonl"), resume)
+    created_resources = seed_databases(target, schema, journal)
+    created_resources.extend(seed_in_waves(
+        schema,
+        lambda db_id, col_id, col_data: migrate_collection(
+            target, db_id, col_id, col_data, journal,
+            os.path.join(checkpoint_dir, f"migrate_{name}_{db_id}_{col_id}.json"), resume=resume,
+            page_size=page_size, batch_size=batch_size, batch_workers=batch_workers, max_attempts=max_attempts
+        ),
+        workers=workers
+    ))
+    journal.close()
     return created_resources
 
-def compare_project_states(source, destination):
-    diff = DeepDiff(source, destination, ignore_order=True)
-    return diff if diff else "✅ Project states match!"
 
+def strip_documents(project):
+    """Copy of the project tree without documents, what is left is small enough for DeepDiff."""
+    stripped = {k: v for k, v in project.items() if k != "databases"}
+    stripped["databases"] = {
+        db_id: {
+            **{k: v for k, v in db_data.items() if k != "collections"},
+            "collections": {
+                col_id: {k: v for k, v in col_data.items() if k not in ("documents", "fingerprint", "updated_watermark")}
+                for col_id, col_data in db_data.get("collections", {}).items()
+            }
+        }
+        for db_id, db_data in project.get("databases", {}).items()
+    }
+    return stripped
+
+
+def compare_project_states(source, destination, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    DeepDiff the schema (attributes, functions, buckets, ...) and hash-join documents
+    per collection on $id, which stays near-linear in the number of documents.
+    Collections with fingerprints on both sides are only descended into where they differ.
+    """
+    result = {}
+    schema_diff = DeepDiff(strip_documents(source), strip_documents(destination), ignore_order=True)
+    if schema_diff:
+        result["schema"] = json.loads(schema_diff.to_json())
+
+    document_diffs = {}
+    src_dbs = source.get("databases", {})
+    dest_dbs = destination.get("databases", {})
+    for db_id in sorted(set(src_dbs) | set(dest_dbs)):
+        src_cols = src_dbs.get(db_id, {}).get("collections", {})
+        dest_cols = dest_dbs.get(db_id, {}).get("collections", {})
+        for col_id in sorted(set(src_cols) | set(dest_cols)):
+            src_col = src_cols.get(col_id, {})
+            dest_col = dest_cols.get(col_id, {})
+            if src_col.get("fingerprint") and dest_col.get("fingerprint"):
+                if src_col["fingerprint"]["hash"] == dest_col["fingerprint"]["hash"]:
+                    continue
+                col_diff = diff_fingerprinted(
+                    src_col.get("documents", []), dest_col.get("documents", []),
+                    src_col["fingerprint"], dest_col["fingerprint"], sample_size=sample_size
+                )
+            else:
+                col_diff = diff_documents(
+                    src_col.get("documents", []), dest_col.get("documents", []), sample_size=sample_size
+                )
+            if has_differences(col_diff):
+                document_diffs[f"{db_id}/{col_id}"] = col_diff
+    if document_diffs:
+        result["documents"] = document_diffs
+    return result if result else "✅ Project states match!"
+
+
+def compare_live_projects(target, sample_size=DEFAULT_SAMPLE, workers=1):
+    """
+    Compare the source project (the module's `databases`) with the `target` Databases service
+    without pulling either: counts, attribute definitions and a sample of documents per
+    collection, see live_sample. Collections are compared `workers` at a time.
+    """
+    src_schema = read_schema(databases)
+    dest_schema = read_schema(target)
+    result = {}
+    jobs = []
+    src_dbs = src_schema["databases"]
+    dest_dbs = dest_schema["databases"]
+    for db_id in sorted(set(src_dbs) | set(dest_dbs)):
+        src_cols = src_dbs.get(db_id, {}).get("collections", {})
+        dest_cols = dest_dbs.get(db_id, {}).get("collections", {})
+        for col_id in sorted(set(src_cols) | set(dest_cols)):
+            if col_id not in dest_cols:
+                result[f"{db_id}/{col_id}"] = "missing in destination"
+            elif col_id not in src_cols:
+                result[f"{db_id}/{col_id}"] = "extra in destination"
+            else:
+                jobs.append((db_id, col_id, src_cols[col_id]["attributes"], dest_cols[col_id]["attributes"]))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            (db_id, col_id, executor.submit(sample_collection, databases, target, db_id, col_id, src_attrs, dest_attrs, sample_size))
+            for db_id, col_id, src_attrs, dest_attrs in jobs
+        ]
+        for db_id, col_id, future in futures:
+            report = future.result()
+            icon = "✅" if is_match(report) else "❌"
+            print(f"{icon} {db_id}/{col_id}: {format_count(report['source_count'])} -> "
+                  f"{format_count(report['destination_count'])} documents, "
+                  f"{report['mismatches']} of {report['sampled']} sampled differ, "
+                  f"at most {report['max_mismatch_rate']:.2%} differ overall (95% confidence)")
+            if not is_match(report):
+                result[f"{db_id}/{col_id}"] = report
+    return result if result else "✅ Sampled project states match!"
 
-def save_to_file(data, path):
+
+def save_to_file(data, path, snapshot_format="json", documents_root=None):
+    """
+    Save a snapshot as JSON, as the manifest of a streamed (jsonl) snapshot directory, or as a
+    compressed columnar file. `documents_root` is where streamed collections were written.
+    """
+    if snapshot_format == "columnar":
+        if documents_root:
+            data = attach_jsonl_documents(data, documents_root)
+        write_columnar_snapshot(data, path)
+        return
+    # A directory is a streamed snapshot, its documents are already on disk
+    if os.path.isdir(path):
+        path = os.path.join(path, SNAPSHOT_MANIFEST)
     with open(path, "w") as f:
         json.dump(data, f, indent=2)
 
 
 def load_from_file(path):
-    with open(path, "r") as f:
-        return json.load(f)
+    """
+    Load any snapshot format. Documents of jsonl and columnar snapshots are lazy iterables
+    that read one collection, and one block, at a time.
+    """
+    if is_columnar_snapshot(path):
+        return read_columnar_snapshot(path)
+    if not os.path.isdir(path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+    with open(os.path.join(path, SNAPSHOT_MANIFEST), "r") as f:
+        snapshot = json.load(f)
+    return attach_jsonl_documents(snapshot, path)
 
 
 if __name__ == "__main__":
@@ -411,18 +1248,91 @@ if __name__ == "__main__":
     parser.add_argument("--pull", action="store_true", help="Pull full Appwrite project state")
     parser.add_argument("--output", type=str, default="project_state.json", help="Path to save pulled state")
     parser.add_argument("--compare", action="store_true", help="Compare two pulled project states")
+    parser.add_argument("--sample", type=int, nargs="?", const=DEFAULT_SAMPLE, help=f"With --compare, compare --from-env and --to-env live from counts, attributes and this many sampled documents per collection and side (default {DEFAULT_SAMPLE})")
     parser.add_argument("--source", type=str, help="Path to source JSON")
     parser.add_argument("--destination", type=str, help="Path to destination JSON")
-    parser.add_argument("--resume", action="store_true", help="Resume from last checkpoint if available")
+    parser.add_argument("--resume", action="store_true", help="Resume a pull or a seed from its last checkpoint if available")
     parser.add_argument("--checkpoint_dir", type=str, default="checkpoints", help="Directory to store checkpoints")
     parser.add_argument("--seed", type=str, help="Seed local Appwrite project using snapshot JSON")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help=f"Documents per list request (max {MAX_PAGE_SIZE})")
+    parser.add_argument("--pagination", choices=["cursor", "offset"], default="cursor", help="Page documents with cursor_after (default) or offset")
+    parser.add_argument("--workers", type=int, default=1, help="Collections pulled or seeded in parallel")
+    parser.add_argument("--rps", type=float, help="Cap on requests per second across all threads, the server's X-RateLimit budget is always followed")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Documents per create_documents call when seeding")
+    parser.add_argument("--batch-workers", type=int, default=1, help="Batches sent in parallel per collection when seeding")
+    parser.add_argument("--attempts", type=int, default=10, help="Max retry attempts per seeding batch")
+    parser.add_argument("--diff-samples", type=int, default=DEFAULT_SAMPLE_SIZE, help="Documents per collection shown with a field-level diff in --compare")
+    parser.add_argument("--fields", type=str, help="Comma-separated attributes to pull instead of every attribute of each collection")
+    parser.add_argument("--previous", type=str, help="Previous snapshot, --pull then only fetches documents updated since it and merges them")
+    parser.add_argument("--migrate", action="store_true", help="Copy databases from --from-env to --to-env directly, without a snapshot file")
+    parser.add_argument("--from-env", type=str, help="Source environment of --migrate and --sample: .env.<name> or <NAME>_APPWRITE_* variables")
+    parser.add_argument("--to-env", type=str, help="Destination environment of --migrate and --sample, same lookup as --from-env")
+    parser.add_argument("--files-dir", type=str, help="Content-addressed store of bucket file contents, --pull downloads into it and --seed uploads from it")
+    parser.add_argument("--file-workers", type=int, default=4, help="Files downloaded or uploaded in parallel with --files-dir")
+    parser.add_argument("--pool-size", type=int, help=f"Keep-alive connections shared by all threads (default: enough for --workers x --batch-workers, at least {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each response")
+    parser.add_argument("--gzip-requests", action="store_true", help="Gzip request bodies, only for servers that accept Content-Encoding: gzip")
+    parser.add_argument("--metrics-out", type=str, help="Write request latencies, bytes, documents per second and stage timings to this file, CSV when it ends in .csv, JSON otherwise")
+    parser.add_argument("--progress", action="store_true", help="Keep a live progress line on stderr")
+    parser.add_argument("--format", choices=["json", "jsonl", "columnar"], default="json", help="Snapshot format: one JSON file, a directory with a JSON Lines file per collection written while pulling, or one gzip-compressed columnar file")
 
     args = parser.parse_args()
 
+    clients = [client]
+    if args.migrate or args.sample:
+        if not (args.from_env and args.to_env):
+            parser.error("--migrate and --sample need --from-env and --to-env")
+        try:
+            client = env_client(args.from_env)
+            target_client = env_client(args.to_env)
+        except ValueError as e:
+            parser.error(str(e))
+        databases = Databases(client)
+        clients = [client, target_client]
+
+    pool_size = args.pool_size or max(DEFAULT_POOL_SIZE, args.workers * args.batch_workers, args.file_workers)
+    for each_client in clients:
+        # One limiter per project, they are separate servers
+        each_client.configure(
+            pool_size=pool_size,
+            timeout=args.timeout,
+            compress=args.gzip_requests,
+            limiter=AdaptiveLimiter(rate=args.rps, max_concurrency=pool_size)
+        )
+    if args.progress:
+        metrics.start_progress()
+
     if args.pull:
+        # Columnar snapshots are assembled at the end from collections streamed to a staging directory
+        snapshot_dir = None
+        if args.format == "jsonl":
+            snapshot_dir = args.output
+        elif args.format == "columnar":
+            snapshot_dir = args.output + ".staging"
+        previous = None
+        if args.previous:
+            if os.path.abspath(args.previous) == os.path.abspath(args.output):
+                parser.error("--previous and --output must be different snapshots")
+            previous = load_from_file(args.previous)
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
         try:
-            state, logs = pull_full_project_state(resume=args.resume, checkpoint_dir=args.checkpoint_dir)
-            save_to_file(state, args.output)
+            state, logs = pull_full_project_state(
+                resume=args.resume,
+                checkpoint_dir=args.checkpoint_dir,
+                page_size=args.page_size,
+                pagination=args.pagination,
+                workers=args.workers,
+                snapshot_dir=snapshot_dir,
+                fields=args.fields.split(",") if args.fields else None,
+                previous=previous,
+                files_dir=args.files_dir,
+                file_workers=args.file_workers
+            )
+            with metrics.stage("save_snapshot"):
+                save_to_file(state, args.output, args.format, documents_root=snapshot_dir)
+            if args.format == "columnar" and not state.get("incomplete_collections"):
+                shutil.rmtree(snapshot_dir)
             print(f"📄 Full project state saved to `{args.output}`")
             print("\n--- LOGS ---")
             for log in logs:
@@ -436,7 +1346,7 @@ if __name__ == "__main__":
             # Save partial state with completed: False
             partial_state = locals().get('state', {"completed": False})
             partial_state["completed"] = False
-            save_to_file(partial_state, args.output)
+            save_to_file(partial_state, args.output, args.format, documents_root=snapshot_dir)
             print(f"❌ Error during pull: {e}")
             print("\n--- LOGS ---")
             logs = locals().get('logs', [])
@@ -450,14 +1360,52 @@ if __name__ == "__main__":
     if args.compare and args.source and args.destination:
         src = load_from_file(args.source)
         dest = load_from_file(args.destination)
-        diff = compare_project_states(src, dest)
+        diff = compare_project_states(src, dest, sample_size=args.diff_samples)
         print("🧾 Migration Comparison Result:")
-        print(diff)
+        print(diff if isinstance(diff, str) else json.dumps(diff, indent=2))
 
+    if args.compare and args.sample:
+        print(f"🎲 Sampling {args.from_env} against {args.to_env}")
+        diff = compare_live_projects(Databases(target_client), sample_size=args.sample, workers=args.workers)
+        print("🧾 Migration Comparison Result:")
+        print(diff if isinstance(diff, str) else json.dumps(diff, indent=2))
+
+    if args.migrate:
+        print(f"🚚 Migrating {args.from_env} -> {args.to_env}")
+        created = migrate_project(
+            Databases(target_client),
+            f"{args.from_env}_{args.to_env}",
+            resume=args.resume,
+            checkpoint_dir=args.checkpoint_dir,
+            page_size=args.page_size,
+            batch_size=args.batch_size,
+            batch_workers=args.batch_workers,
+            max_attempts=args.attempts,
+            workers=args.workers
+        )
+        print("✅ Migration complete. Resources created:")
+        for item in created:
+            print(item)
 
     if args.seed:
         print(f"🌱 Seeding from snapshot: {args.seed}")
-        created = seed_from_snapshot(args.seed)
+        created = seed_from_snapshot(
+            args.seed,
+            batch_size=args.batch_size,
+            batch_workers=args.batch_workers,
+            max_attempts=args.attempts,
+            workers=args.workers,
+            resume=args.resume,
+            checkpoint_dir=args.checkpoint_dir,
+            files_dir=args.files_dir,
+            file_workers=args.file_workers
+        )
         print("✅ Seeding complete. Resources created:")
         for item in created:
-            print(item)
\ No newline at end of file
+            print(item)
+
+    if args.progress:
+        metrics.stop_progress()
+    if args.metrics_out:
+        metrics.write_report(args.metrics_out)
+        print(f"📊 Metrics saved to `{args.metrics_out}`")
@@ -0,0 +1,150 @@
+"""
+Rate and retry control shared by every Appwrite call of the three tools.
+
+An AdaptiveLimiter sits in appwrite_transport.PooledClient. Every call takes a token from a
+bucket (the --rps cap, and the server's X-RateLimit-* budget once half of it is used) and a
+slot in a concurrency window. The window grows by one per window of successful calls and
+halves when the server answers 429 or 503, or does not answer at all (AIMD).
+
+retry_call and backoff give every retry the same jittered wait, or the server's reset time.
+
+client.configure(limiter=AdaptiveLimiter(rate=50, max_concurrency=16))
+page = retry_call(databases.list_documents, database_id="db", collection_id="posts")
+"""
+import time
+import random
+import threading
+
+DEFAULT_ATTEMPTS = 5
+BASE_WAIT = 0.5
+MAX_WAIT = 30
+MAX_RESET_WAIT = 120  # never trust a reset header further out than this
+OVERLOAD_CODES = (429, 503)
+TRANSIENT_CODES = (0, 408, 429, 500, 502, 503, 504)  # 0: no response (connection error, timeout)
+DECREASE_INTERVAL = 1.0  # a burst of 429s from one window only halves it once
+
+# Own generator so retry jitter never consumes the global random state callers seed
+_jitter = random.Random()
+
+
+def is_transient(error):
+    """Errors worth retrying: no response, rate limited, or failing on the server side."""
+    return getattr(error, "code", None) in TRANSIENT_CODES
+
+
+def retry_after(headers, now=None):
+    """Seconds the server asks to wait (Retry-After, or X-RateLimit-Reset as a unix time), or None."""
+    now = time.time() if now is None else now
+    try:
+        if headers.get("Retry-After"):
+            return min(float(headers["Retry-After"]), MAX_RESET_WAIT)
+        if headers.get("X-RateLimit-Reset"):
+            return min(max(0.0, float(headers["X-RateLimit-Reset"]) - now), MAX_RESET_WAIT)
+    except ValueError:
+        pass
+    return None
+
+
+def backoff(attempt, error=None):
+    """Seconds to wait before retrying after failed `attempt` (1-based)."""
+    wait = getattr(error, "retry_after", None)
+    if wait is not None:
+        return wait + _jitter.uniform(0, BASE_WAIT)
+    # Equal jitter: half of the exponential step is fixed, the other half random
+    cap = min(MAX_WAIT, BASE_WAIT * 2 ** attempt)
+    return cap / 2 + _jitter.uniform(0, cap / 2)
+
+
+def retry_call(fn, *args, max_attempts=DEFAULT_ATTEMPTS, **kwargs):
+    """Call fn(*args, **kwargs), retrying transient errors with backoff. Other errors are raised at once."""
+    attempt = 1
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_attempts or not is_transient(e):
+                raise
+            wait = backoff(attempt, e)
+            print(f"⚠️ Attempt {attempt} of {getattr(fn, '__name__', 'call')} failed: {e}")
+            print(f"⏳ Retrying in {wait:.2f}s...")
+            time.sleep(wait)
+            attempt += 1
+
+
+class AdaptiveLimiter:
+    """Token bucket plus AIMD concurrency window, shared by every thread using one client."""
+
+    def __init__(self, rate=None, max_concurrency=16):
+        self.rate = rate
+        self.max_concurrency = max_concurrency
+        self.window = float(max_concurrency)
+        self.in_flight = 0
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.server_rate = None  # pace that spends the server's remaining budget until its reset
+        self.server_reset = 0.0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.throttled = 0
+        self.condition = threading.Condition()
+
+    def current_rate(self, now):
+        rates = [self.rate, self.server_rate if now < self.server_reset else None]
+        rates = [rate for rate in rates if rate]
+        return min(rates) if rates else None
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                wait = self.blocked_until - now
+                rate = self.current_rate(now)
+                if rate:
+                    self.tokens = min(max(1.0, rate), self.tokens + (now - self.updated) * rate)
+                    if wait <= 0 and self.tokens < 1:
+                        wait = (1 - self.tokens) / rate
+                self.updated = now
+                if wait <= 0 and self.in_flight < int(self.window):
+                    if rate:
+                        self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                # Woken early by release() when a slot frees up
+                self.condition.wait(wait if wait > 0 else None)
+
+    def release(self, status=None, headers=None):
+        """Record the outcome of a call, status None meaning no response arrived."""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if status is None or status in OVERLOAD_CODES:
+                self.throttled += 1
+                if now - self.last_decrease >= DECREASE_INTERVAL:
+                    self.window = max(1.0, self.window / 2)
+                    self.last_decrease = now
+            elif status < 400:
+                self.window = min(float(self.max_concurrency), self.window + 1 / self.window)
+            if headers:
+                self.observe(status, headers, now)
+            self.condition.notify_all()
+
+    def observe(self, status, headers, now):
+        try:
+            limit = int(headers.get("X-RateLimit-Limit", 0))
+            remaining = int(headers.get("X-RateLimit-Remaining", -1))
+        except ValueError:
+            return
+        reset_in = retry_after(headers)
+        if reset_in is None:
+            return
+        if status == 429 or remaining == 0:
+            self.blocked_until = max(self.blocked_until, now + reset_in)
+        elif limit and 0 <= remaining < limit / 2:
+            self.server_rate = remaining / max(reset_in, 1.0)
+            self.server_reset = now + reset_in
+
+    def resize(self, max_concurrency):
+        with self.condition:
+            self.max_concurrency = max_concurrency
+            self.window = min(self.window, float(max_concurrency))
+            self.condition.notify_all()
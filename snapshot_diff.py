@@ -0,0 +1,169 @@
+"""
+Document diffing that scales with the number of documents.
+
+Documents are joined on `$id` (or on their content when they have no id) through a
+hash of their canonical JSON, server-assigned keys left out, so only the rows that
+actually differ are kept around for a field-level DeepDiff. A Fingerprint summarises a whole collection so two
+snapshots can skip the collections, and the buckets, that are equal.
+"""
+import json
+import hashlib
+from collections import Counter
+from deepdiff import DeepDiff
+
+DEFAULT_SAMPLE_SIZE = 5
+BUCKET_PREFIX_LENGTH = 2  # 256 buckets
+
+
+def content(doc):
+    # Keys the server assigns ($sequence, $createdAt, ...) differ between two projects holding the same data
+    return {k: v for k, v in doc.items() if not k.startswith("$") or k == "$id"}
+
+
+def document_hash(doc):
+    canonical = json.dumps(content(doc), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def bucket_of(doc_id):
+    # Appwrite ids start with a timestamp, so the prefix is taken from a hash of the id
+    return hashlib.sha1(str(doc_id).encode("utf-8")).hexdigest()[:BUCKET_PREFIX_LENGTH]
+
+
+class Fingerprint:
+    """
+    Order-independent hash of a collection: documents are XOR-ed into buckets keyed on
+    their $id hash prefix, and the root hashes the sorted buckets. Equal roots mean equal
+    collections, otherwise only the buckets whose hash differs need to be compared.
+    """
+
+    def __init__(self, state=None):
+        # prefix -> [xor of document hashes, document count]
+        self.buckets = {}
+        self.restore(state)
+
+    def restore(self, state):
+        """Continue from a `to_dict()` result, e.g. the one saved in a pull checkpoint."""
+        self.buckets = {
+            prefix: [int(bucket["hash"], 16), bucket["count"]]
+            for prefix, bucket in (state or {}).get("buckets", {}).items()
+        }
+
+    def add(self, doc):
+        bucket = self.buckets.setdefault(bucket_of(doc["$id"]), [0, 0])
+        bucket[0] ^= int(document_hash(doc), 16)
+        bucket[1] += 1
+
+    def update(self, docs):
+        for doc in docs:
+            self.add(doc)
+
+    def to_dict(self):
+        buckets = {
+            prefix: {"hash": f"{value:040x}", "count": count}
+            for prefix, (value, count) in sorted(self.buckets.items())
+        }
+        root = hashlib.sha1(json.dumps(buckets, sort_keys=True).encode("utf-8")).hexdigest()
+        return {"hash": root, "count": sum(count for _, count in self.buckets.values()), "buckets": buckets}
+
+
+def differing_buckets(source_fingerprint, destination_fingerprint):
+    source_buckets = source_fingerprint.get("buckets", {})
+    destination_buckets = destination_fingerprint.get("buckets", {})
+    return {
+        prefix for prefix in set(source_buckets) | set(destination_buckets)
+        if source_buckets.get(prefix) != destination_buckets.get(prefix)
+    }
+
+
+def diff_fingerprinted(source_docs, destination_docs, source_fingerprint, destination_fingerprint,
+                       sample_size=DEFAULT_SAMPLE_SIZE):
+    """diff_documents restricted to the buckets whose fingerprints differ."""
+    buckets = differing_buckets(source_fingerprint, destination_fingerprint)
+    if not buckets:
+        count = source_fingerprint.get("count", 0)
+        return {
+            "source_count": count, "destination_count": count, "added": 0, "removed": 0, "changed": 0,
+            "unchanged": count, "samples": {"added": [], "removed": [], "changed": {}},
+        }
+    source_subset = [doc for doc in source_docs if bucket_of(doc["$id"]) in buckets]
+    destination_subset = [doc for doc in destination_docs if bucket_of(doc["$id"]) in buckets]
+    result = diff_documents(source_subset, destination_subset, sample_size=sample_size)
+    # Documents of the equal buckets were not looked at, they are unchanged by construction
+    result["unchanged"] += source_fingerprint.get("count", 0) - len(source_subset)
+    result["source_count"] = source_fingerprint.get("count", 0)
+    result["destination_count"] = destination_fingerprint.get("count", 0)
+    result["buckets_compared"] = len(buckets)
+    return result
+
+
+def diff_documents(source_docs, destination_docs, key="$id", sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Hash join two document lists on `key`. Returns counts of added, removed, changed and
+    unchanged documents plus up to `sample_size` ids of each kind, with a DeepDiff for the
+    sampled changed ones. With key=None documents are compared as a multiset of contents.
+    """
+    if key is None:
+        return diff_unkeyed(source_docs, destination_docs, sample_size)
+
+    source_hashes = {doc[key]: document_hash(doc) for doc in source_docs}
+    result = {
+        "source_count": len(source_hashes),
+        "destination_count": 0,
+        "added": 0,
+        "removed": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "samples": {"added": [], "removed": [], "changed": {}},
+    }
+    seen = set()
+    changed_samples = {}
+    for doc in destination_docs:
+        doc_id = doc[key]
+        seen.add(doc_id)
+        result["destination_count"] += 1
+        source_hash = source_hashes.get(doc_id)
+        if source_hash is None:
+            result["added"] += 1
+            if len(result["samples"]["added"]) < sample_size:
+                result["samples"]["added"].append(doc_id)
+        elif source_hash != document_hash(doc):
+            result["changed"] += 1
+            if len(changed_samples) < sample_size:
+                changed_samples[doc_id] = doc
+        else:
+            result["unchanged"] += 1
+
+    for doc_id in source_hashes:
+        if doc_id not in seen:
+            result["removed"] += 1
+            if len(result["samples"]["removed"]) < sample_size:
+                result["samples"]["removed"].append(doc_id)
+
+    # Second pass over the source only to pick up the few sampled rows
+    if changed_samples:
+        for doc in source_docs:
+            if doc[key] in changed_samples:
+                diff = DeepDiff(content(doc), content(changed_samples[doc[key]]), ignore_order=True)
+                result["samples"]["changed"][doc[key]] = json.loads(diff.to_json())
+    return result
+
+
+def diff_unkeyed(source_docs, destination_docs, sample_size=DEFAULT_SAMPLE_SIZE):
+    source = Counter(document_hash(doc) for doc in source_docs)
+    destination = Counter(document_hash(doc) for doc in destination_docs)
+    added = destination - source
+    removed = source - destination
+    return {
+        "source_count": sum(source.values()),
+        "destination_count": sum(destination.values()),
+        "added": sum(added.values()),
+        "removed": sum(removed.values()),
+        "changed": 0,
+        "unchanged": sum((source & destination).values()),
+        "samples": {"added": list(added)[:sample_size], "removed": list(removed)[:sample_size], "changed": {}},
+    }
+
+
+def has_differences(result):
+    return bool(result["added"] or result["removed"] or result["changed"])
@@ -0,0 +1,173 @@
+"""
+On-disk snapshot formats that are read one collection at a time.
+
+A columnar snapshot is a single file:
+
+    MAGIC | block | block | ... | index | index offset (8 bytes, big endian)
+
+Each block is a gzip-compressed JSON object holding up to BLOCK_ROWS documents of one
+collection as columns. The index, also gzip-compressed JSON, holds the project tree
+without documents and, per collection, the offset, length and row count of its blocks.
+"""
+import os
+import gzip
+import json
+import struct
+import threading
+
+MAGIC = b"AWSNAPC1"
+BLOCK_ROWS = 5000
+COMPRESS_LEVEL = 6
+
+
+class JsonlDocuments:
+    """Documents of one collection in a JSON Lines file, read lazily every time they are iterated."""
+
+    def __init__(self, path, count=None):
+        self.path = path
+        self.count = count
+
+    def __iter__(self):
+        with open(self.path, "r") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __len__(self):
+        if self.count is None:
+            with open(self.path, "rb") as f:
+                self.count = sum(1 for _ in f)
+        return self.count
+
+
+class ColumnarDocuments:
+    """Documents of one collection in a columnar snapshot, decompressed a block at a time."""
+
+    def __init__(self, path, blocks):
+        self.path = path
+        self.blocks = blocks
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            for offset, length, _ in self.blocks:
+                f.seek(offset)
+                yield from decode_block(f.read(length))
+
+    def __len__(self):
+        return sum(rows for _, _, rows in self.blocks)
+
+
+def encode_block(docs):
+    columns = {}
+    absent = {}
+    for i, doc in enumerate(docs):
+        for key in doc:
+            if key not in columns:
+                # Rows before the first one that has this key don't have it
+                columns[key] = [None] * i
+                if i:
+                    absent[key] = list(range(i))
+        for key, values in columns.items():
+            if key in doc:
+                values.append(doc[key])
+            else:
+                values.append(None)
+                absent.setdefault(key, []).append(i)
+    block = {"rows": len(docs), "columns": columns, "absent": absent}
+    return gzip.compress(json.dumps(block, separators=(",", ":")).encode("utf-8"), COMPRESS_LEVEL)
+
+
+def decode_block(data):
+    block = json.loads(gzip.decompress(data))
+    docs = [{} for _ in range(block["rows"])]
+    for key, values in block["columns"].items():
+        absent = set(block["absent"].get(key, ()))
+        for i, value in enumerate(values):
+            if i not in absent:
+                docs[i][key] = value
+    return docs
+
+
+class ColumnarSnapshotWriter:
+    """Appends column blocks to a snapshot file, the index is written by close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.blocks = {}
+        self.lock = threading.Lock()
+
+    def write_documents(self, db_id, col_id, docs):
+        """Write an iterable of documents as blocks of BLOCK_ROWS, holding one block in memory."""
+        blocks = self.blocks.setdefault(f"{db_id}/{col_id}", [])
+        batch = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) == BLOCK_ROWS:
+                blocks.append(self.write_block(batch))
+                batch = []
+        if batch:
+            blocks.append(self.write_block(batch))
+
+    def write_block(self, docs):
+        data = encode_block(docs)
+        with self.lock:
+            offset = self.file.tell()
+            self.file.write(data)
+        return [offset, len(data), len(docs)]
+
+    def close(self, project):
+        index = {"project": project, "blocks": self.blocks}
+        offset = self.file.tell()
+        self.file.write(gzip.compress(json.dumps(index).encode("utf-8"), COMPRESS_LEVEL))
+        self.file.write(struct.pack(">Q", offset))
+        self.file.close()
+
+
+def is_columnar_snapshot(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_columnar_snapshot(project, path):
+    """
+    Save a project whose collections hold `documents` (a list or any lazy iterable) as a
+    columnar snapshot, one collection and one block at a time.
+    """
+    writer = ColumnarSnapshotWriter(path)
+    manifest = dict(project)
+    manifest["databases"] = {}
+    for db_id, db_data in project.get("databases", {}).items():
+        collections = {}
+        for col_id, col_data in db_data.get("collections", {}).items():
+            writer.write_documents(db_id, col_id, col_data.get("documents", []))
+            collections[col_id] = {k: v for k, v in col_data.items() if k not in ("documents", "documents_file")}
+        manifest["databases"][db_id] = {**db_data, "collections": collections}
+    writer.close(manifest)
+
+
+def read_columnar_snapshot(path):
+    """Project tree of a columnar snapshot, every `documents` is a lazy ColumnarDocuments."""
+    with open(path, "rb") as f:
+        f.seek(-8, os.SEEK_END)
+        (offset,) = struct.unpack(">Q", f.read(8))
+        f.seek(offset)
+        index = json.loads(gzip.decompress(f.read()[:-8]))
+    project = index["project"]
+    for db_id, db_data in project.get("databases", {}).items():
+        for col_id, col_data in db_data.get("collections", {}).items():
+            col_data["documents"] = ColumnarDocuments(path, index["blocks"].get(f"{db_id}/{col_id}", []))
+    return project
+
+
+def attach_jsonl_documents(project, root):
+    """Replace the `documents_file` of streamed collections by lazy JsonlDocuments."""
+    for db_data in project.get("databases", {}).values():
+        for col_data in db_data.get("collections", {}).values():
+            documents_file = col_data.pop("documents_file", None)
+            count = col_data.pop("document_count", None)
+            if documents_file is not None:
+                col_data["documents"] = JsonlDocuments(os.path.join(root, documents_file), count)
+    return project
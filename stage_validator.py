@@ -1,6 +1,6 @@
 import time
 import os
-from appwrite.client import Client
+from appwrite_transport import PooledClient
 from appwrite.services.account import Account
 from appwrite.services.databases import Databases
 from appwrite.services.functions import Functions
@@ -29,7 +29,7 @@ APPWRITE_ENDPOINT = os.environ.get("APPWRITE_ENDPOINT")
 APPWRITE_PROJECT_ID = os.environ.get("APPWRITE_PROJECT_ID")
 API_KEY = os.environ.get("APPWRITE_API_KEY")
 
-client = Client()
+client = PooledClient()
 client.set_endpoint(APPWRITE_ENDPOINT)
 client.set_project(APPWRITE_PROJECT_ID)
 client.set_key(API_KEY)
@@ -75,10 +75,8 @@ def run():
     )
     log("User logged in")
 
-    # User-authenticated client
-    user_client = Client()
-    user_client.set_endpoint(APPWRITE_ENDPOINT)
-    user_client.set_project(APPWRITE_PROJECT_ID)
+    # User-authenticated client, shares the admin client's connections
+    user_client = client.clone(credentials=False)
     user_client.set_session(session["secret"])
 
     user_account = Account(user_client)
@@ -154,9 +152,7 @@ def run():
 
     # ========= GUEST ASSERTIONS =========
 
-    guest_client = Client()
-    guest_client.set_endpoint(APPWRITE_ENDPOINT)
-    guest_client.set_project(APPWRITE_PROJECT_ID)
+    guest_client = client.clone(credentials=False)
 
     guest_db = Databases(guest_client)
 